@@ -0,0 +1,260 @@
+"""
+ASGI entry point of the formatter, to serve it outside Azure Functions with the same parsing and printing pipeline:
+    uvicorn api.asgi:app --workers 4    # from the repository root
+    python -m api.asgi --port 7071      # local dev server, needs `pip install uvicorn`
+
+Serves POST /api/formatter and GET /api/healthcheck with the same answers as the Azure functions.
+Uploads are streamed to a spooled temporary file while they are received, parsing and printing run
+in a bounded thread pool, so the event loop only moves bytes.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, IO, Iterable, Mapping, Optional, Tuple
+
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, Field, File, Data, Epilogue, NeedData
+
+from .formatter import FormatterException
+from .formatter.pipeline import format_upload, error_answer
+from .formatter.telemetry import init_telemetry, transaction
+from .healthcheck import status
+
+# threads parsing and printing rosters. They share the GIL, so run several server processes
+# (e.g. uvicorn --workers) to use all cores of the node
+ASGI_THREADS = int(os.getenv("FORMATTER_ASGI_THREADS", 0)) or os.cpu_count() or 1
+# formatter requests handled at once, including the ones still receiving their upload or waiting for a thread,
+# the rest are rejected with 503 right away instead of queueing without bound
+ASGI_MAX_PENDING = int(os.getenv("FORMATTER_ASGI_MAX_PENDING", 32))
+# maximum size of the request body in bytes
+MAX_UPLOAD_SIZE = int(os.getenv("FORMATTER_MAX_UPLOAD_SIZE", 16 * 1024 * 1024))
+# maximum size of a form field other than the roster
+MAX_FIELD_SIZE = 16 * 1024
+# uploads bigger than this are spooled to disk while they are received
+SPOOL_SIZE = 1024 * 1024
+
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+Upload = Tuple[str, IO[bytes]]
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int, message: str, headers: Iterable[Tuple[bytes, bytes]] = ()):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = list(headers)
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def _format(filename: str, stream: IO[bytes], fields: Mapping[str, str]) -> Tuple[int, dict]:
+    """
+    Runs in the thread pool, as the Azure function does.
+    :return: (status code, answer)
+    """
+    init_telemetry()
+    with transaction("formatter"):
+        try:
+            return 200, format_upload(filename, stream, fields)
+        except Exception as e:
+            logging.exception(e)
+            return 400, error_answer(e)
+
+
+class FormatterApp:
+    def __init__(
+            self,
+            threads: int = ASGI_THREADS,
+            max_pending: int = ASGI_MAX_PENDING,
+            max_upload_size: int = MAX_UPLOAD_SIZE,
+    ):
+        self.threads = threads
+        self.max_pending = max_pending
+        self.max_upload_size = max_upload_size
+        self.pending = 0
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    async def __call__(self, scope: dict, receive: Receive, send: Send) -> None:
+        if scope['type'] == 'lifespan':
+            await self.__lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        try:
+            await self.__route(scope, receive, send)
+        except HTTPError as e:
+            await self.__respond(send, e.status_code, {'info': str(e)}, e.headers)
+        except ClientDisconnected:
+            logging.debug("Client disconnected before the upload was received.")
+
+    async def __lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.__executor()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.executor is not None:
+                    self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def __executor(self) -> ThreadPoolExecutor:
+        # created on first use as well, for servers without lifespan support
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="formatter")
+        return self.executor
+
+    async def __route(self, scope: dict, receive: Receive, send: Send) -> None:
+        path = scope['path'].rstrip('/')
+        if path == '/api/healthcheck':
+            if scope['method'] != 'GET':
+                raise HTTPError(405, "Method not allowed.", [(b'allow', b'GET')])
+            await self.__respond(send, 200, status())
+        elif path == '/api/formatter':
+            if scope['method'] != 'POST':
+                raise HTTPError(405, "Method not allowed.", [(b'allow', b'POST')])
+            await self.__format(scope, receive, send)
+        else:
+            raise HTTPError(404, "Not found.")
+
+    async def __format(self, scope: dict, receive: Receive, send: Send) -> None:
+        if self.pending >= self.max_pending:
+            raise HTTPError(503, "Server is busy, please try again later.", [(b'retry-after', b'1')])
+
+        self.pending += 1
+        try:
+            headers = dict(scope['headers'])
+            length = headers.get(b'content-length', None)
+            if length is not None and length.isdigit() and int(length) > self.max_upload_size:
+                raise HTTPError(413, f"Request is too big: more than {self.max_upload_size} bytes.")
+
+            fields, upload = await self.__receive_form(headers.get(b'content-type', b'').decode('latin-1'), receive)
+            if upload is None:
+                status_code, answer = 400, error_answer(FormatterException("File is not provided."))
+            else:
+                filename, stream = upload
+                with stream:
+                    status_code, answer = await asyncio.get_running_loop().run_in_executor(
+                        self.__executor(), _format, filename, stream, fields
+                    )
+            await self.__respond(send, status_code, answer)
+        finally:
+            self.pending -= 1
+
+    async def __receive_form(self, content_type: str, receive: Receive) -> Tuple[Dict[str, str], Optional[Upload]]:
+        """
+        Decodes multipart form as its chunks arrive. The 'roster' file is written to a spooled temporary file,
+        other files are skipped.
+        :return: (form fields, (filename, stream) of the roster if it was sent)
+        """
+        mimetype, parameters = parse_options_header(content_type)
+        boundary = parameters.get('boundary', None)
+        if mimetype != 'multipart/form-data' or not boundary:
+            raise HTTPError(400, "Roster has to be sent as multipart/form-data.")
+
+        decoder = MultipartDecoder(boundary.encode('latin-1'))
+        fields: Dict[str, str] = {}
+        upload: Optional[Upload] = None
+        field: Optional[Tuple[str, bytearray]] = None
+        target: Optional[IO[bytes]] = None
+        received = 0
+        complete = False
+        try:
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    raise ClientDisconnected()
+                chunk = message.get('body', b'')
+                more_body = message.get('more_body', False)
+                received += len(chunk)
+                if received > self.max_upload_size:
+                    raise HTTPError(413, f"Request is too big: more than {self.max_upload_size} bytes.")
+
+                if complete:
+                    continue  # the rest of the body after the closing boundary is ignored
+                decoder.receive_data(chunk)
+                if not more_body:
+                    decoder.receive_data(None)
+                while not complete and not isinstance(event := decoder.next_event(), NeedData):
+                    if isinstance(event, Epilogue):
+                        complete = True
+                    elif isinstance(event, File):
+                        field, target = None, None
+                        if event.name == 'roster' and upload is None:
+                            target = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+                            upload = (event.filename, target)
+                    elif isinstance(event, Field):
+                        field, target = (event.name, bytearray()), None
+                    elif isinstance(event, Data):
+                        if target is not None:
+                            target.write(event.data)
+                        elif field is not None:
+                            field[1].extend(event.data)
+                            if len(field[1]) > MAX_FIELD_SIZE:
+                                raise HTTPError(413, f"Form field {field[0]} is too big.")
+                            if not event.more_data:
+                                fields[field[0]] = field[1].decode('utf-8')
+        except ValueError as e:
+            # raised by the decoder for broken multipart content
+            if upload is not None:
+                upload[1].close()
+            raise HTTPError(400, f"Unable to read the form: {e}")
+        except BaseException:
+            if upload is not None:
+                upload[1].close()
+            raise
+
+        if not complete:
+            if upload is not None:
+                upload[1].close()
+            raise HTTPError(400, "Unable to read the form: unexpected end of the request.")
+        if upload is not None:
+            upload[1].seek(0)
+        return fields, upload
+
+    @staticmethod
+    async def __respond(send: Send, status_code: int, answer: dict, headers: Iterable[Tuple[bytes, bytes]] = ()):
+        body = json.dumps(answer).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status_code,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('latin-1')),
+                *headers,
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = FormatterApp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local server of the formatter API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7071)
+    parser.add_argument("--workers", type=int, default=1, help="number of server processes")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Local server needs uvicorn: pip install uvicorn")
+    uvicorn.run("api.asgi:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
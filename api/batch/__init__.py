@@ -0,0 +1,33 @@
+import azure.functions
+import logging
+import json
+
+# importing formatter also initializes logging
+from ..formatter import FormatterException
+from ..formatter.batch import format_batch
+from ..formatter.telemetry import init_telemetry, transaction
+
+
+def main(req: azure.functions.HttpRequest) -> azure.functions.HttpResponse:
+    init_telemetry()
+    with transaction("batch"):
+        return format_batch_request(req)
+
+
+def format_batch_request(req: azure.functions.HttpRequest) -> azure.functions.HttpResponse:
+    logging.debug("Batch HTTP trigger fired")
+    try:
+        options = req.form.to_dict()
+        uploads = [(x.filename, x.read()) for x in req.files.getlist('roster')]
+        if not uploads:
+            raise FormatterException("Files are not provided.")
+
+        answer = format_batch(uploads, options)
+        logging.info("Batch formatted.", extra={"40k_batch": answer['stats']})
+        return azure.functions.HttpResponse(json.dumps(answer), status_code=200, mimetype='application/json')
+
+    except Exception as e:
+        logging.exception(e)
+        return azure.functions.HttpResponse(json.dumps({
+            'info': f"Exception occurred: \n\n{str(e)}", 'debug': str(e)
+        }), status_code=400, mimetype='application/json')
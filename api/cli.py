@@ -0,0 +1,256 @@
+"""
+Offline formatting of many rosters at once, outside of the HTTP functions, e.g. to re-check points of archived
+rosters after a balance update:
+    python -m api.cli rosters/ event.zip --formats wtc --show-secondaries --output results.jsonl
+
+Directories are walked recursively for .ros, .rosz and .zip files, .zip archives are searched for .ros and .rosz
+files. Rosters are formatted with RosterView and the printers in a pool of worker processes, which read the files
+themselves: the main process only schedules chunks of paths and writes one JSON line per roster, in input order.
+Throughput and errors are summarized on stderr, exit code is 1 if any roster failed.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from typing import Dict, IO, Iterable, List, Mapping, Optional, Tuple
+from zipfile import ZipFile, BadZipFile
+
+from .formatter.batch import format_member, init_worker, read_member
+from .formatter.extensions import FormatterOptions
+from .formatter.formats import ALL_FORMATS, parse_formats
+
+ROSTER_SUFFIXES = (".ros", ".rosz")
+# (path of the file, name of the archive member or None for a roster file)
+Source = Tuple[str, Optional[str]]
+# error message or None, bytes read, whether total points differ from the sum of units, JSON line
+Outcome = Tuple[Optional[str], int, bool, str]
+
+# per-process state: options and formats of the run, see batch.init_worker
+_worker_options: Tuple[Tuple[str, str], ...] = ()
+_worker_formats: Tuple[str, ...] = ()
+# archive of the last member read by the process, kept open as members of an archive come one after another:
+# opening it reads the whole central directory, which is as slow as formatting a roster for big archives
+_archive: Optional[ZipFile] = None
+
+
+def find_rosters(paths: Iterable[str]) -> Tuple[List[Source], Dict[str, str]]:
+    """
+    :param paths: directories, .zip archives and roster files, other files in directories are skipped
+    :return: rosters in the order of paths (directories sorted by name), errors of unreadable archives by path
+    """
+    sources = []
+    errors = {}
+
+    def add_archive(path: str) -> None:
+        try:
+            with ZipFile(path) as archive:
+                sources.extend(
+                    (path, x.filename) for x in archive.infolist()
+                    if not x.is_dir() and x.filename.endswith(ROSTER_SUFFIXES)
+                )
+        except (BadZipFile, OSError) as e:
+            errors[path] = f"{path} is not a valid zip archive: {e}"
+
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, directories, files in os.walk(path):
+                directories.sort()
+                for name in sorted(files):
+                    if name.endswith(".zip"):
+                        add_archive(os.path.join(directory, name))
+                    elif name.endswith(ROSTER_SUFFIXES):
+                        sources.append((os.path.join(directory, name), None))
+        elif path.endswith(".zip"):
+            add_archive(path)
+        else:
+            # explicitly given files are formatted whatever the name, RosterView reports wrong ones
+            sources.append((path, None))
+    return sources, errors
+
+
+def _init_worker(options: Mapping[str, str], formats: List[str], verbose: bool) -> None:
+    global _worker_options, _worker_formats
+    if not verbose:
+        # failures are reported in the output, tracebacks of thousands of rosters would only slow workers down
+        logging.disable(logging.ERROR)
+    _worker_options = tuple(sorted(options.items()))
+    _worker_formats = tuple(formats)
+    init_worker(_worker_options, _worker_formats)
+
+
+def _source_name(source: Source) -> str:
+    path, member = source
+    return path if member is None else f"{path}/{member}"
+
+
+def _open(source: Source) -> IO[bytes]:
+    path, member = source
+    if member is None:
+        return open(path, 'rb')
+    global _archive
+    if _archive is None or _archive.filename != path:
+        _close_archive()
+        _archive = ZipFile(path)
+    return io.BytesIO(read_member(_archive, _archive.getinfo(member)))
+
+
+def _close_archive() -> None:
+    global _archive
+    if _archive is not None:
+        _archive.close()
+        _archive = None
+
+
+def _format_source(source: Source) -> Outcome:
+    """
+    Formats one roster in a worker process, failures are returned, not raised.
+    """
+    record = {'file': _source_name(source)}
+    size = 0
+
+    def open_roster() -> IO[bytes]:
+        nonlocal size
+        stream = _open(source)
+        size = stream.seek(0, io.SEEK_END)
+        stream.seek(0)
+        return stream
+
+    roster, answer, error = format_member(source[1] or source[0], open_roster, _worker_options, _worker_formats)
+    points_differ = False
+    if error is None:
+        record.update(answer)
+        # total written in the roster by BattleScribe against the sum of the costs of its units
+        record['points'] = {'roster': roster.pts_total, 'units': sum(x.pts for x in roster.forces)}
+        points_differ = record['points']['roster'] != record['points']['units']
+        record['units'] = roster.units_count
+    else:
+        record['error'] = error
+    return error, size, points_differ, json.dumps(record, ensure_ascii=False)
+
+
+def format_rosters(
+        sources: List[Source],
+        output: IO[str],
+        options: Mapping[str, str] = None,
+        formats: List[str] = None,
+        workers: int = 0,
+        chunk_size: int = 0,
+        verbose: bool = False,
+) -> dict:
+    """
+    Formats rosters and writes a JSON line per roster to output, in the order of sources.
+    :param formats: output formats, all of them are printed from the same parsed roster
+    :param workers: number of worker processes, number of CPUs if 0, rosters are formatted in this process if 1
+    :param chunk_size: rosters sent to a worker at once, chosen from the number of rosters and workers if 0
+    :return: statistics and errors by roster
+    """
+    options = dict(options or {})
+    formats = formats or ['default']
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sources)))
+    # a few chunks per worker: big enough to make scheduling overhead negligible,
+    # small enough for the workers to finish at about the same time
+    chunk_size = chunk_size or max(1, min(len(sources) // (workers * 8), 64))
+
+    start = time.perf_counter()
+    errors = {}
+    size = 0
+    points_differ = 0
+    if workers == 1:
+        _init_worker(options, formats, verbose)
+        outcomes = map(_format_source, sources)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options, formats, verbose))
+        outcomes = pool.map(_format_source, sources, chunksize=chunk_size)
+    try:
+        for source, (error, source_size, differ, line) in zip(sources, outcomes):
+            output.write(line + "\n")
+            size += source_size
+            points_differ += differ
+            if error is not None:
+                errors[_source_name(source)] = error
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        else:
+            _close_archive()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'files': len(sources),
+        'failed': len(errors),
+        'points_differ': points_differ,
+        'workers': workers,
+        'chunk_size': chunk_size,
+        'seconds': round(elapsed, 3),
+        'files_per_second': round(len(sources) / elapsed, 2) if elapsed > 0 else None,
+        'megabytes_per_second': round(size / elapsed / 1e6, 2) if elapsed > 0 else None,
+        'errors': errors,
+    }
+
+
+def summary(stats: Mapping, errors: Mapping[str, str], most_common: int = 10) -> str:
+    """
+    :param errors: all errors by file, including the ones of unreadable archives
+    """
+    lines = [
+        f"{stats['files'] - stats['failed']} of {stats['files']} rosters formatted in {stats['seconds']} s "
+        f"by {stats['workers']} workers: {stats['files_per_second']} rosters/s, {stats['megabytes_per_second']} MB/s",
+    ]
+    if stats['points_differ']:
+        lines.append(f"{stats['points_differ']} rosters: total points differ from the sum of their units")
+    if errors:
+        lines.append(f"{len(errors)} errors:")
+        # first line of the message, rosters fail for the same reasons
+        counter = Counter(x.strip().split('\n')[0] for x in errors.values())
+        lines.extend(f"{count:>6}  {message}" for message, count in counter.most_common(most_common))
+        if len(counter) > most_common:
+            lines.append(f"        ...and {len(counter) - most_common} other messages")
+    return '\n'.join(lines)
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m api.cli", description="Formats rosters from directories and .zip archives to JSON lines",
+    )
+    parser.add_argument("paths", nargs="+", help=".ros/.rosz files, .zip archives with them or directories")
+    parser.add_argument("--output", "-o", default="-", help="JSON lines file, stdout by default")
+    parser.add_argument("--formats", default="default", help=f"{', '.join(ALL_FORMATS)}, comma-separated or all")
+    parser.add_argument("--workers", "-j", type=int, default=0, help="worker processes, number of CPUs by default")
+    parser.add_argument("--chunk-size", type=int, default=0, help="rosters sent to a worker at once")
+    parser.add_argument("--verbose", "-v", action="store_true", help="log details of every failure")
+    for field in fields(FormatterOptions):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", action="store_true")
+    args = parser.parse_args(arguments)
+
+    formats = parse_formats(args.formats) or [args.formats]
+    if unknown := [x for x in formats if x not in ALL_FORMATS]:
+        parser.error(f"unknown format {unknown[0]}, available formats: {', '.join(ALL_FORMATS)}")
+    options = {x.name: 'on' for x in fields(FormatterOptions) if getattr(args, x.name)}
+
+    sources, errors = find_rosters(args.paths)
+    output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    try:
+        for path, message in errors.items():
+            output.write(json.dumps({'file': path, 'error': message}, ensure_ascii=False) + "\n")
+        stats = format_rosters(sources, output, options, formats, args.workers, args.chunk_size, args.verbose)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    errors.update(stats['errors'])
+    print(summary(stats, errors), file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
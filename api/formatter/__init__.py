@@ -1,91 +1,33 @@
-import os
-
 import azure.functions
 import logging
-import io
 import json
 
-import sentry_sdk
-from sentry_sdk.integrations.logging import LoggingIntegration
-
-from .rosterview import RosterView
 from .utils import FormatterException
-from .formats import RussianTournamentsPrinter, WTCPrinter, DefaultPrinter, GWPrinter
-
-sentry_logging = LoggingIntegration(
-    level=logging.INFO,        # Capture info and above as breadcrumbs
-    event_level=logging.WARNING  # Send errors as events
-)
-
-sentry_sdk.init(
-    dsn=os.getenv("SENTRY_DSN"),
-    integrations=[sentry_logging],
-    debug=True,
-    attach_stacktrace=True,
-
-    traces_sample_rate=1.0
-)
+from .pipeline import format_upload, error_answer
+from .telemetry import init_telemetry, transaction
 
 logging.basicConfig()
 
 
 def main(req: azure.functions.HttpRequest) -> azure.functions.HttpResponse:
+    # Sentry is initialized by the first request, so cold start and other functions of the app don't pay for it
+    init_telemetry()
+    with transaction("formatter"):
+        return format_request(req)
+
+
+def format_request(req: azure.functions.HttpRequest) -> azure.functions.HttpResponse:
     logging.debug("HTTP trigger fired")
     try:
-        options = req.form.to_dict()
         roster = req.files.get('roster', None)  # Werkzeug.datastructures.FileStorage
         if roster is None:
             raise FormatterException("File is not provided.")
 
-        filename: str = roster.filename
-        content: bytes = roster.read()
-        logging.debug(f"Received file {filename} with length {len(content)} bytes")
-
-        if filename.endswith(".ros"):
-            try:
-                result = RosterView(content.decode('utf-8'), zipped=False, options=options)
-            except UnicodeDecodeError:
-                # because users somehow submit binary .ros files (seems like renamed from .rosz)
-                result = RosterView(io.BytesIO(content), zipped=True, options=options)
-        elif filename.endswith(".rosz"):
-            result = RosterView(io.BytesIO(content), zipped=True, options=options)
-        else:
-            raise FormatterException(
-                "Provided file doesn't end with .ros or .rosz and therefore "
-                "is not a valid BattleScribe file. Please, submit .ros or .rosz file produced by BattleScribe."
-            )
-        logging.debug("Roster successfully parsed.")
-
-        print_format = options.get('formats', 'default')
-
-        if print_format == 'rus':
-            representation = RussianTournamentsPrinter().print(result)
-        elif print_format == 'wtc':
-            representation = WTCPrinter().print(result)
-        elif print_format == "gw":
-            representation = GWPrinter().print(result)
-        else:
-            representation = DefaultPrinter().print(result)
-
-        answer = {
-            'info': representation,
-            'debug': result.debug_info
-        }
-
+        answer = format_upload(roster.filename, roster.stream, req.form.to_dict())
         return azure.functions.HttpResponse(json.dumps(answer), status_code=200, mimetype='application/json')
 
     except Exception as e:
         logging.exception(e)
-        message = (
-            f"Exception occurred: \n\n"
-            f"{str(e)} \n\n"
-            f"If you don't know the reason for the exception, "
-            f"please consider submitting the bug and your roster "
-            f"here: https://github.com/maybe-hello-world/40k-roster-formatter/issues "
-            f"or to my email: maybe.hello.world@gmail.com, or Discord: @maybehelloworld\n\n"
-            f"Thanks, and my apologies for this :)"
+        return azure.functions.HttpResponse(
+            json.dumps(error_answer(e)), status_code=400, mimetype='application/json'
         )
-
-        return azure.functions.HttpResponse(json.dumps({
-            'info': message, 'debug': message
-        }), status_code=400, mimetype='application/json')
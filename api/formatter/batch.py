@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import io
+import logging
+import os
+import threading
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import AbstractSet, Callable, Container, IO, Iterable, Tuple, Mapping, Dict, List, Optional
+from zipfile import ZipFile, ZipInfo, BadZipFile
+
+from .rosterview import RosterView
+from .streaming import SizeLimitedStream, MAX_ROSTER_SIZE
+from .extensions import FormatterOptions
+from .formats import get_printer, required_data
+from .parallel import PROCESS_CONTEXT
+from .utils import FormatterException
+
+# maximum number of rosters in one batch request
+MAX_BATCH_FILES = int(os.getenv("FORMATTER_MAX_BATCH_FILES", 500))
+# number of worker processes, defaults to the number of CPUs
+BATCH_WORKERS = int(os.getenv("FORMATTER_BATCH_WORKERS", 0)) or os.cpu_count() or 1
+
+# number of workers -> pool shared by all batch requests of the process, see parallel.force_pool
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def batch_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    :return: process pool with the number of workers shared by all batch requests, created on first use.
+     Workers are started by a fork server, see parallel.PROCESS_CONTEXT.
+    """
+    with _lock:
+        pool = _pools.get(workers, None)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_CONTEXT)
+        return pool
+
+
+@lru_cache(maxsize=16)
+def init_worker(
+        options: Tuple[Tuple[str, str], ...], formats: Tuple[str, ...],
+) -> Tuple[FormatterOptions, AbstractSet[str]]:
+    """
+    Options of a batch parsed and printers loaded once per worker process, shared by all its rosters of the batch.
+    Called by format_member, or as the initializer of a pool, not to load printers with the first roster.
+    :param options: items of the form options, hashable
+    :return: (formatter options, data rosters are parsed with)
+    """
+    formatter_options = FormatterOptions(**dict(options))
+    for print_format in formats:
+        get_printer(print_format)
+    return formatter_options, required_data(formats, formatter_options)
+
+
+def read_member(archive: ZipFile, member: ZipInfo) -> bytes:
+    """
+    :return: content of the archive member, limited to MAX_ROSTER_SIZE whatever its header says
+    """
+    if member.file_size > MAX_ROSTER_SIZE:
+        raise FormatterException(f"{member.filename} is too big: more than {MAX_ROSTER_SIZE} bytes.")
+    with SizeLimitedStream(archive.open(member), MAX_ROSTER_SIZE) as stream:
+        return stream.read()
+
+
+def format_member(
+        filename: str,
+        open_roster: Callable[[], IO[bytes]],
+        options: Tuple[Tuple[str, str], ...],
+        formats: Tuple[str, ...],
+) -> Tuple[Optional[RosterView], Optional[dict], Optional[str]]:
+    """
+    Formats one roster of a batch in a worker process, failures are returned, not raised.
+    :param open_roster: opens the roster, failing to read it is a failure of the roster
+    :param options: see init_worker
+    :param formats: info of the answer has the output of every format by name if there are several
+    :return: (parsed roster, answer, None) if succeeded, (None, None, error message) if failed
+    """
+    formatter_options, data = init_worker(options, formats)
+    try:
+        with open_roster() as stream:
+            # rosters are formatted in parallel already, forces of one roster are built in its worker process
+            roster = RosterView.from_upload(
+                filename, stream, options=formatter_options, required_data=data, force_workers=0,
+            )
+        info = {x: get_printer(x).print(roster) for x in formats}
+        answer = {'info': info if len(info) > 1 else info[formats[0]]}
+        if formatter_options.debug:
+            answer['debug'] = roster.debug_info
+        return roster, answer, None
+    except Exception as e:
+        logging.exception(e)
+        return None, None, str(e) or type(e).__name__
+
+
+def _format_one(
+        key: str, upload: Tuple[str, bytes], options: Tuple[Tuple[str, str], ...],
+) -> Tuple[str, Optional[dict], Optional[str]]:
+    """
+    :return: (key, answer if succeeded, error message if failed)
+    """
+    filename, content = upload
+    _, answer, error = format_member(
+        filename, lambda: io.BytesIO(content), options, (dict(options).get('formats', 'default'),),
+    )
+    return key, answer, error
+
+
+def _unique_name(name: str, taken: Container[str]) -> str:
+    if name not in taken:
+        return name
+    i = 2
+    while f"{name} ({i})" in taken:
+        i += 1
+    return f"{name} ({i})"
+
+
+def expand_uploads(
+        uploads: Iterable[Tuple[str, bytes]],
+        max_files: int = MAX_BATCH_FILES,
+) -> Tuple[Dict[str, Tuple[str, bytes]], Dict[str, str]]:
+    """
+    Collects rosters from uploaded files: .ros and .rosz files are taken as is,
+    .zip archives are unpacked and all .ros/.rosz files inside them are taken.
+    Broken archives and members that can't be unpacked are reported, the rest of the batch is formatted anyway.
+    :return: (key -> (filename, content), key -> error message), key is the filename of the roster, or of the
+     archive if it can't be read at all, with " (n)" suffix for duplicated names
+    """
+    result = {}
+    errors = {}
+
+    def key(name: str) -> str:
+        return _unique_name(name, result.keys() | errors.keys())
+
+    def add(name: str, content: bytes):
+        if len(result) >= max_files:
+            raise FormatterException(f"Too many rosters in one batch, maximum is {max_files}.")
+        result[key(name)] = (name, content)
+
+    for filename, content in uploads:
+        if not filename.endswith(".zip"):
+            add(filename, content)
+            continue
+
+        try:
+            archive = ZipFile(io.BytesIO(content))
+        except BadZipFile:
+            errors[key(filename)] = f"{filename} is not a valid zip archive."
+            continue
+        for member in archive.infolist():
+            if member.is_dir() or not member.filename.endswith((".ros", ".rosz")):
+                continue
+            try:
+                member_content = read_member(archive, member)
+            except Exception as e:
+                # oversized, corrupted or compressed with an unsupported method
+                logging.warning(f"Unable to unpack {member.filename} from {filename}: {e}")
+                errors[key(member.filename)] = str(e) or f"Unable to unpack {member.filename}."
+                continue
+            add(member.filename, member_content)
+    return result, errors
+
+
+def format_batch(
+        uploads: Iterable[Tuple[str, bytes]],
+        options: Mapping[str, str] = None,
+        workers: int = BATCH_WORKERS,
+) -> dict:
+    """
+    Formats many rosters with the same options in a pool of worker processes.
+    Failure of one roster doesn't affect the others, it's reported in 'errors'.
+
+    :param uploads: (filename, content) of uploaded .ros, .rosz or .zip files
+    :param options: formatting options as received from the form, shared by all rosters
+    :param workers: number of worker processes of the shared pool, rosters are formatted in this process if 1
+    :return: {'results': {filename: answer}, 'errors': {filename: message}, 'stats': {...}},
+     see expand_uploads for the naming of duplicated files
+    """
+    # hashable, to be parsed once per worker
+    options = tuple(sorted((options or {}).items()))
+    start = time.perf_counter()
+    files, errors = expand_uploads(uploads)
+    total = len(files) + len(errors)
+    workers = max(1, min(workers, len(files)))
+
+    if workers == 1:
+        outcomes: List[Tuple[str, Optional[dict], Optional[str]]] = [
+            _format_one(key, upload, options) for key, upload in files.items()
+        ]
+    else:
+        chunksize = max(1, len(files) // (workers * 4))
+        outcomes = list(batch_pool(workers).map(
+            _format_one, files.keys(), files.values(), repeat(options), chunksize=chunksize,
+        ))
+
+    results = {}
+    for key, answer, error in outcomes:
+        if error is None:
+            results[key] = answer
+        else:
+            errors[key] = error
+
+    elapsed = time.perf_counter() - start
+    return {
+        'results': results,
+        'errors': errors,
+        'stats': {
+            'files': total,
+            'failed': len(errors),
+            'workers': workers,
+            'seconds': round(elapsed, 3),
+            'files_per_second': round(total / elapsed, 2) if elapsed > 0 else None,
+        },
+    }
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import os
+import pickle
+import secrets
+import stat
+import tempfile
+import threading
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import fields
+from typing import AbstractSet, Any, Callable, Optional
+
+from .extensions import FormatterOptions
+
+# memory / filesystem / none
+CACHE_BACKEND = os.getenv("FORMATTER_CACHE_BACKEND", "memory")
+# maximum number of cached entries (parsed rosters, rendered outputs and unit indexes together)
+CACHE_SIZE = int(os.getenv("FORMATTER_CACHE_SIZE", 128))
+# maximum approximate size of the entries of the in-process cache in bytes, see approximate_size
+CACHE_MEMORY = int(os.getenv("FORMATTER_CACHE_MEMORY", 256 * 2 ** 20))
+# private to the user running the formatter, see FileSystemCache
+CACHE_DIR = os.getenv("FORMATTER_CACHE_DIR", os.path.join(
+    tempfile.gettempdir(), f"40k-roster-formatter-cache-{os.getuid() if hasattr(os, 'getuid') else 'user'}"
+))
+# secret entries of the filesystem cache are signed with, a random one is kept in the cache directory if not set
+CACHE_KEY = os.getenv("FORMATTER_CACHE_KEY", None)
+
+
+class CacheError(Exception):
+    pass
+
+
+def approximate_size(value: Any) -> int:
+    """
+    Rough memory footprint of a cached value in bytes: parsed rosters and unit indexes tell their own
+    (see RosterView.approximate_size), answers are as big as their text.
+    """
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(approximate_size(x) for x in value.values())
+    return getattr(value, 'approximate_size', 0)
+
+
+class CacheBackend(ABC):
+    """
+    Storage of cached values. get returns None for missing keys, so None can't be cached.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, size: int = 0) -> None:
+        """
+        :param size: approximate size of the value in bytes, see approximate_size
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class NullCache(CacheBackend):
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any, size: int = 0) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache, bounded both by the number of entries and by their approximate size.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE, max_bytes: int = CACHE_MEMORY):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        # key -> (value, size)
+        self.storage = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.storage.get(key, None)
+            if entry is None:
+                return None
+            self.storage.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: Any, size: int = 0) -> None:
+        if size > self.max_bytes:
+            return  # would evict everything else and be evicted itself
+        with self.lock:
+            previous = self.storage.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self.storage[key] = (value, size)
+            self.bytes += size
+            while len(self.storage) > self.max_size or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self.storage.popitem(last=False)
+                self.bytes -= evicted_size
+
+    def __len__(self) -> int:
+        return len(self.storage)
+
+
+class FileSystemCache(CacheBackend):
+    """
+    LRU cache of pickled values in a directory, shared by all worker processes on the host.
+    File modification time is used as the last access time.
+    Unpickling runs code, so the directory has to be private: it's created with mode 0700 and refused if it belongs
+    to another user or others can access it. Entries are signed with HMAC as well and ones with a wrong signature
+    are never unpickled.
+    """
+    KEY_FILE = "key"
+
+    def __init__(self, directory: str = CACHE_DIR, max_size: int = CACHE_SIZE, secret: Optional[str] = CACHE_KEY):
+        """
+        :param secret: key of the signatures, a random one is created in the directory if None
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.__check_private(directory)
+        self.secret = secret.encode('utf-8') if secret is not None else self.__read_secret()
+
+    @staticmethod
+    def __check_private(directory: str) -> None:
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode):
+            raise CacheError(f"Cache directory {directory} is not a directory.")
+        if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+            raise CacheError(f"Cache directory {directory} belongs to another user.")
+        if hasattr(os, 'getuid') and info.st_mode & 0o077:
+            raise CacheError(f"Cache directory {directory} is accessible by other users, its mode has to be 0700.")
+
+    def __read_secret(self) -> bytes:
+        path = os.path.join(self.directory, self.KEY_FILE)
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+        # written aside and linked, so concurrently started workers all end up with the same complete key
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(secrets.token_bytes(32))
+            try:
+                os.link(temporary, path)
+            except FileExistsError:
+                pass
+        finally:
+            os.remove(temporary)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest() + ".pickle")
+
+    def __signature(self, key: str, payload: bytes) -> bytes:
+        # the key is signed too, so an entry can't be passed off as another one
+        return hmac.new(self.secret, key.encode('utf-8') + b"\0" + payload, hashlib.sha256).digest()
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self.__path(key)
+        try:
+            with open(path, 'rb') as f:
+                signature = f.read(hashlib.sha256().digest_size)
+                payload = f.read()
+            if not hmac.compare_digest(signature, self.__signature(key, payload)):
+                logging.warning("Cache entry with a wrong signature is ignored.")
+                return None
+            value = pickle.loads(payload)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # broken or concurrently evicted entry is just a miss
+            logging.warning(f"Unable to read cache entry: {e}")
+            return None
+
+    def set(self, key: str, value: Any, size: int = 0) -> None:
+        # write to a temporary file first, so other workers never read a half-written entry
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with os.fdopen(handle, 'wb') as f:
+                f.write(self.__signature(key, payload))
+                f.write(payload)
+            os.replace(temporary, self.__path(key))
+        except Exception as e:
+            logging.warning(f"Unable to write cache entry: {e}")
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+        self.__evict()
+
+    def __entries(self):
+        return [x for x in os.scandir(self.directory) if x.name.endswith(".pickle")]
+
+    def __evict(self) -> None:
+        entries = self.__entries()
+        if len(entries) <= self.max_size:
+            return
+        entries.sort(key=lambda x: x.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_size]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # evicted by another worker
+
+    def __len__(self) -> int:
+        return len(self.__entries())
+
+
+class ResultCache:
+    """
+    Content-addressed cache of formatter results with three tiers:
+     - parsed RosterView, keyed by content digest, formatter options and data computed for printers
+       (shared by all output formats that need the same data),
+     - rendered answer, keyed by content digest, formatter options and output format,
+     - units of rosters parsed with UNIT_DIGESTS, keyed by content digest, to reuse them
+       for the next version of the roster (see incremental.UnitIndex).
+    Digest is computed from the decompressed roster, see RosterView.content_digest.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        # with NullCache, results are just built: callers don't need a digest then
+        self.enabled = not isinstance(backend, NullCache)
+        self.lock = threading.Lock()
+        self.counters = {tier: {'hits': 0, 'misses': 0} for tier in ('roster', 'rendered', 'units')}
+
+    @staticmethod
+    def options_key(options: FormatterOptions) -> str:
+        return ','.join(f"{x.name}={getattr(options, x.name)}" for x in fields(options))
+
+    def __get_or_build(self, tier: str, key: str, build: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return build()
+        value = self.backend.get(key)
+        with self.lock:
+            self.counters[tier]['hits' if value is not None else 'misses'] += 1
+        if value is None:
+            value = build()
+            self.backend.set(key, value, approximate_size(value))
+        return value
+
+    def roster(
+            self, digest: str, options: FormatterOptions, required_data: AbstractSet[str], build: Callable[[], Any],
+    ) -> Any:
+        return self.__get_or_build(
+            'roster', f"roster:{digest}:{self.options_key(options)}:{','.join(sorted(required_data))}", build
+        )
+
+    def rendered(self, digest: str, options: FormatterOptions, print_format: str, render: Callable[[], Any]) -> Any:
+        return self.__get_or_build(
+            'rendered', f"rendered:{digest}:{self.options_key(options)}:{print_format}", render
+        )
+
+    def units(self, digest: str) -> Optional[Any]:
+        """
+        :return: UnitIndex of the roster with the digest, None if it wasn't indexed or was evicted
+        """
+        value = self.backend.get(f"units:{digest}")
+        with self.lock:
+            self.counters['units']['hits' if value is not None else 'misses'] += 1
+        return value
+
+    def store_units(self, digest: str, index: Any) -> None:
+        self.backend.set(f"units:{digest}", index, approximate_size(index))
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = {tier: dict(values) for tier, values in self.counters.items()}
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': len(self.backend),
+            **counters,
+        }
+
+
+def create_backend(name: str = CACHE_BACKEND) -> CacheBackend:
+    if name == "filesystem":
+        try:
+            return FileSystemCache()
+        except (CacheError, OSError) as e:
+            logging.error(f"Unable to use the filesystem cache, using in-process cache: {e}")
+            return MemoryCache()
+    if name == "none":
+        return NullCache()
+    if name != "memory":
+        logging.warning(f"Unknown cache backend {name}, using in-process cache.")
+    return MemoryCache()
+
+
+result_cache = ResultCache(create_backend())
@@ -1,10 +1,9 @@
 import logging
 from dataclasses import dataclass, fields
-from typing import Optional
+from typing import Optional, List, Tuple
 
-from lxml.objectify import ObjectifiedElement
-
-from .utils import is_upgrade, try_parse_int
+from .utils import try_parse_int
+from .model import Selection, Unit
 
 logging.basicConfig()
 logger = logging.getLogger("Extensions")
@@ -12,6 +11,14 @@ logger.setLevel(logging.DEBUG)
 
 PROFILE_WOUNDS_POSITION = 3
 
+# data computed from the parsed roster on top of the selections, printers declare which of it they need
+SECONDARIES = "secondaries"
+MODEL_COUNTS = "model counts"
+ALL_DATA = frozenset({SECONDARIES, MODEL_COUNTS})
+# digests of unit selections to reuse units of the next versions of the roster, see incremental.UnitIndex.
+# Never computed unless asked for, so not a part of ALL_DATA
+UNIT_DIGESTS = "unit digests"
+
 
 @dataclass(repr=True, eq=True, order=True)
 class FormatterOptions:
@@ -19,6 +26,7 @@ class FormatterOptions:
     show_secondaries: bool = False
     remove_costs: bool = False
     show_model_count: bool = False
+    debug: bool = False  # collect debug info about secondaries
 
     def __init__(self, **kwargs):
         class_fields = {field.name for field in fields(self)}
@@ -33,6 +41,7 @@ class FormatterOptions:
         self.show_secondaries = self.show_secondaries == 'on'
         self.remove_costs = self.remove_costs == 'on'
         self.show_model_count = self.show_model_count == 'on'
+        self.debug = self.debug == 'on'
 
         if self.hide_basic_selections:
             self.selector_checker = BasicSelectorChecker()
@@ -47,29 +56,24 @@ class BasicSelectorChecker:
     ]
 
     @staticmethod
-    def is_basic(child: ObjectifiedElement):
-        selection_name = child.get('name', "")
+    def is_basic(child: Selection):
+        selection_name = child.name
         if selection_name in BasicSelectorChecker.dirty_hacks:
             return False
         if "warlord" in selection_name.lower():
             return False  # 'warlord' is never a basic selection
 
-        if child['link'].attrib['type'] == 'model':
+        if child.type == 'model':
             return False  # show all models
 
-        result = "entryGroupId" in child['link'].attrib  # if it is a part of selection group - it is not basic
+        result = child.entry_group_id is not None  # if it is a part of selection group - it is not basic
         return not result
 
-    def clean_obligatory_selections(self, force: 'ForceView', result: dict) -> dict:
-        result['children'] = [
-            self.clean_obligatory_selections(force, child) for child in result['children']
-            if not force.options.selector_checker.is_basic(child)
-        ]
-        return result
-
-
-def add_double_whitespaces(formatted_roster: str) -> str:
-    return '\n'.join(x + '  ' for x in formatted_roster.split('\n'))
+    def visible_selections(self, selections: List[Selection]) -> List[Selection]:
+        """
+        Selections without the basic ones. Doesn't modify parsed roster, so it can be shared between printers.
+        """
+        return [x for x in selections if not self.is_basic(x)]
 
 
 def number_of_units(roster: 'RosterView') -> int:
@@ -80,158 +84,161 @@ def number_of_units(roster: 'RosterView') -> int:
     return result
 
 
-def count_secondaries(roster: 'RosterView') -> dict:
+def count_secondaries(roster: 'RosterView') -> Tuple[dict, List[str]]:
+    """
+    Sums contributions of every unit, see unit_secondaries. Doesn't modify the roster, it can be shared by threads.
+    Debug lines are only built with the debug option: all characters go first, then Bring It Down, as they always did.
+    :return: secondaries, debug lines
+    """
+    character_units = character_models = bid_models = bid_points = 0
+    debug = roster.options.debug
+    counted = []
+    for force in roster.forces:
+        for _, units in force.enumerated_unit_categories.values():
+            for unit in units:
+                characters, bring_it_down = unit_secondaries(unit)
+                character_units += characters[0]
+                character_models += characters[1]
+                bid_models += bring_it_down[0]
+                bid_points += bring_it_down[1]
+                if debug:
+                    counted.append((unit, characters, bring_it_down))
+
+    lines = []
+    if debug:
+        lines = [x for unit, characters, _ in counted for x in __character_lines(unit, characters)]
+        lines += [x for unit, _, bring_it_down in counted for x in __bring_it_down_lines(unit, bring_it_down)]
+        for debug_string in lines:
+            logger.debug(debug_string)
     return {
-        'characters': __count_assasination(roster),
-        'bring it down': __count_bring_it_down(roster),
-    }
+        'characters': (character_units, character_models),
+        'bring it down': (bid_models, bid_points),
+    }, lines
+
+
+def unit_secondaries(unit: Unit) -> Tuple[Tuple[int, int, tuple, bool], Tuple[int, int, tuple]]:
+    """
+    Contribution of the unit to the secondaries, computed once and kept on the unit,
+    so units reused from a previous roster (see incremental.UnitIndex) aren't counted again.
+    Only numbers are kept, debug lines are built from them when asked for.
+    :return: ((character units, character models, (name, number) of character models, whole unit is a character),
+     (Bring It Down models, points, (models, wounds) of every counted profile))
+    """
+    if unit.secondaries is None:
+        unit.secondaries = (__count_assasination(unit), __count_bring_it_down(unit))
+    return unit.secondaries
+
+
+def __character_lines(unit: Unit, characters: Tuple[int, int, tuple, bool]) -> List[str]:
+    units, models, selections, whole_unit = characters
+    if not units:
+        return []
+    lines = [f'Unit: {unit.name} - Character']
+    lines += [f'Models: {name} - Character - Number: {number}' for name, number in selections]
+    if whole_unit:
+        lines.append(f'Models: {unit.name} - Character - Number: {models} - Whole Unit is a Character')
+    return lines
+
+
+def __bring_it_down_lines(unit: Unit, bring_it_down: Tuple[int, int, tuple]) -> List[str]:
+    return [f'Bring It Down: {unit.name} - {models} models - {wounds} wounds' for models, wounds in bring_it_down[2]]
 
 
 def __check_unit_category(
-        selection: ObjectifiedElement,
+        selection: Selection,
         category_name: str,
 ):
-    # check unit categories
-    if hasattr(selection, 'categories'):
-        for category in selection.categories.getchildren():
-            if category.get("name", "") == category_name:
-                return True
-
-    # check categories of all selections
-    if hasattr(selection, 'selections'):
-        for children in selection.selections.getchildren():
-            if __check_unit_category(children, category_name):
-                return True
+    # categories of the unit and all its selections are aggregated during parsing
+    return category_name in selection.subtree_categories
 
-    return False
 
-
-def __count_assasination(roster: 'RosterView') -> (int, int):
+def __count_assasination(unit: Unit) -> Tuple[int, int, tuple, bool]:
     """
-    Returns total character units and models
-    :return: (units, models)
+    Returns character units and models of the unit
+    :return: (units, models, (name, number) of character selections, whether the whole unit is a character)
     """
-    units = 0
+    if not __check_unit_category(unit, 'Character'):
+        return 0, 0, (), False
+
+    # calculate models
+    if not unit.children:
+        return 1, 1, (), False
+
     models = 0
-    for force in roster.forces:
-        categories = [x[1] for x in force.enumerated_unit_categories.values()]
-
-        for category in categories:
-            for unit in category:
-                if __check_unit_category(unit['link'], 'Character'):
-                    debug_string = f'Unit: {unit["name"]} - Character'
-                    logger.debug(debug_string)
-                    roster.debug_info += debug_string + "\n"
-                    units += 1
-
-                    # calculate models
-                    if not hasattr(unit['link'], 'selections'):
-                        models += 1
-                    else:
-                        models_found = 0
-                        for selection in unit['link'].selections.getchildren():
-                            if __check_unit_category(selection, 'Character'):
-                                current_models = try_parse_int(selection.get('number', 1)) or 1
-                                models_found += current_models
-                                models += current_models
-                                debug_string = f'Models: {selection.get("name", "Unknown Name")} - ' \
-                                               f'Character - Number: {current_models}'
-                                logger.debug(debug_string)
-                                roster.debug_info += debug_string + "\n"
-                        if models_found == 0:
-                            current_models = try_parse_int(unit.get('models', 1)) or 1
-                            debug_string = f'Models: {unit.get("name", "Unknown Name")} - ' \
-                                           f'Character - Number: {current_models} - Whole Unit is a Character'
-                            logger.debug(debug_string)
-                            roster.debug_info += debug_string + "\n"
-                            models += current_models
-
-    return units, models
-
-
-def __count_bring_it_down(roster: 'RosterView') -> (int, int):
+    selections = []
+    for selection in unit.children:
+        if __check_unit_category(selection, 'Character'):
+            current_models = selection.raw_number or 1
+            models += current_models
+            selections.append((selection.raw_name, current_models))
+    if models == 0:
+        return 1, unit.models or 1, (), True
+    return 1, models, tuple(selections), False
+
+
+def __wounds_from_profiles(unit: Selection) -> Optional[int]:
+    for profile in unit.profiles or []:
+        if profile.type_name != 'Unit' or not profile.characteristics:
+            continue
+        if len(profile.characteristics) <= PROFILE_WOUNDS_POSITION:
+            continue
+        wounds = try_parse_int(profile.characteristics[PROFILE_WOUNDS_POSITION])
+        if wounds is not None:
+            return wounds
+
+    return None
+
+
+def __wounds_to_points(wounds: int) -> int:
+    if wounds <= 9:
+        return 0
+    elif 10 <= wounds <= 14:
+        return 1
+    elif 15 <= wounds <= 19:
+        return 2
+    else:
+        return 3
+
+
+def __count_bring_it_down(unit: Unit) -> Tuple[int, int, tuple]:
     """
-    Return models and points
-    :return: models, points
+    Return models and points of the unit
+    :return: models, points, (models, wounds) of every counted profile
     """
+    if not (__check_unit_category(unit, 'Monster') or __check_unit_category(unit, 'Vehicle')) or unit.upgrade:
+        return 0, 0, ()
 
-    def get_wounds_from_profiles(unit: ObjectifiedElement) -> Optional[int]:
-        profiles = [
-            x for x in unit['link'].profiles.getchildren() if
-            x.get("typeName", None) == 'Unit' and
-            hasattr(x, 'characteristics') and
-            try_parse_int(x.characteristics.getchildren()[PROFILE_WOUNDS_POSITION]) is not None
-        ]
-
-        if not profiles:
-            return None
-
-        return int(profiles[0].characteristics.getchildren()[PROFILE_WOUNDS_POSITION])
-
-    def wounds_to_points(_wounds: int) -> int:
-        if _wounds <= 9:
-            return 0
-        elif 10 <= _wounds <= 14:
-            return 1
-        elif 15 <= _wounds <= 19:
-            return 2
-        else:
-            return 3
+    # if object have profile with Unit type
 
-    points = 0
+    if unit.type == 'model':
+        wounds = __wounds_from_profiles(unit)
+        if not wounds:
+            return 0, 0, ()
+        return 1, __wounds_to_points(wounds) + 2, ((1, wounds),)
+
+    # otherwise - let's count it as a unit
+    # thanks to mistakes in BS database and people not prioritizing fixing them
+
+    # 2 variants:
+    # either unit has profiles
+    # or each selection in the unit
+
+    # variant 1
+    if unit.profiles is not None:
+        wounds = __wounds_from_profiles(unit)
+        if wounds:
+            return unit.models, (__wounds_to_points(wounds) + 2) * unit.models, ((unit.models, wounds),)
+
+    # variant 2
     models = 0
-    for force in roster.forces:
-        categories = [
-            *[x[1] for x in force.enumerated_unit_categories.values()]
-        ]
-        for category in categories:
-            for unit in category:
-                if __check_unit_category(unit['link'], 'Monster') or __check_unit_category(unit['link'], 'Vehicle'):
-                    if is_upgrade(unit['link']):
-                        continue
-
-                    # if object have profile with Unit type
-
-                    if unit['link'].get('type', None) == 'model':
-                        wounds = get_wounds_from_profiles(unit)
-                        if not wounds:
-                            continue
-                        debug_string = f'Bring It Down: {unit["name"]} - 1 models - {wounds} wounds'
-                        logger.debug(debug_string)
-                        roster.debug_info += debug_string + '\n'
-                        points += wounds_to_points(wounds) + 2
-                        models += 1
-                        continue
-
-                    # otherwise - let's count it as a unit
-                    # thanks to mistakes in BS database and people not prioritizing fixing them
-
-                    # 2 variants:
-                    # either unit has profiles
-                    # or each selection in the unit
-
-                    # variant 1
-                    if hasattr(unit['link'], 'profiles'):
-                        wounds = get_wounds_from_profiles(unit)
-                        if wounds:
-                            debug_string = f'Bring It Down: {unit["name"]} - {unit["models"]} models - {wounds} wounds'
-                            logger.debug(debug_string)
-                            roster.debug_info += debug_string + '\n'
-                            wtp = wounds_to_points(wounds) + 2
-                            wtp *= unit['models']
-                            points += wtp
-                            models += unit['models']
-                            continue
-
-                    # variant 2
-                    for target in [x for x in unit['children'] if not is_upgrade(x['link'])]:
-                        wounds = get_wounds_from_profiles(target)
-                        if not wounds:
-                            continue
-                        models_count = target.get('number', 1)
-                        debug_string = f'Bring It Down: {unit["name"]} - {models_count} models - {wounds} wounds'
-                        logger.debug(debug_string)
-                        roster.debug_info += debug_string + '\n'
-                        points += (wounds_to_points(wounds) + 2) * models_count
-                        models += models_count
-    return models, points
+    points = 0
+    counted = []
+    for target in [x for x in unit.children if not x.upgrade]:
+        wounds = __wounds_from_profiles(target)
+        if not wounds:
+            continue
+        models_count = target.number
+        counted.append((models_count, wounds))
+        points += (__wounds_to_points(wounds) + 2) * models_count
+        models += models_count
+    return models, points, tuple(counted)
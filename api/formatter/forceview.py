@@ -1,71 +1,110 @@
 from __future__ import annotations
 
 import logging
-import re
 
-from typing import Optional, List
+from functools import cached_property
+from typing import List, Dict, Mapping, Optional, Tuple
 
 from lxml import objectify
 from lxml.objectify import ObjectifiedElement
 
-from .utils import is_upgrade
+from .utils import category_index, try_parse_int
+from .names import normalize_name
+from .model import Selection, Unit, Profile
 from .extensions import FormatterOptions
+from .incremental import selection_digest
 
 logging.basicConfig()
+logger = logging.getLogger("ForceView")
+logger.setLevel(logging.DEBUG)
+
+# unit categories with their short names, ordered by dispatch priority:
+# unit goes to the first category from this list it has as a primary one
+UNIT_CATEGORIES = (
+    ("Epic Hero", "EH"),
+    ("Character", "CH"),
+    ("Battleline", "BL"),
+    ("Infantry", "IN"),
+    ("Swarm", "SW"),
+    ("Mounted", "MO"),
+    ("Beast", "BE"),
+    ("Monster", "MS"),
+    ("Vehicle", "VE"),
+    ("Drone", "DR"),
+    ("Dedicated Transport", "DT"),
+    ("Fortification", "FT"),
+    ("Allied Units", "AU"),
+)
+UNIT_CATEGORY_PRIORITY = {name: priority for priority, (name, _) in enumerate(UNIT_CATEGORIES)}
 
 
 class ForceView:
-    def __init__(self, force: objectify.ObjectifiedElement, options: FormatterOptions):
+    def __init__(
+            self,
+            force: objectify.ObjectifiedElement,
+            options: FormatterOptions,
+            count_models: bool = True,
+            digests: bool = False,
+            previous_units: Optional[Mapping[str, Unit]] = None,
+    ):
+        """
+        :param count_models: whether to count models of every unit, Unit.models stays 0 otherwise
+        :param digests: whether to compute Unit.digest of every unit, see incremental.UnitIndex
+        :param previous_units: units of a previous version of the roster by digest, parsed with the same
+         count_models, units with the same digest are taken from there instead of being parsed (needs digests)
+        """
         self.options = options
+        self.count_models = count_models
         self.pts = 0
+        self.reused_units = 0
         self.catalogue = force.get("catalogueName", "")
 
         self.detachment: str = force.get("name", None)
         if self.detachment is None:
             self.detachment = "Unparsed Detachment"
             logging.error(f"Detachment name is not found.")
-        self.logger = logging.getLogger(f'ForceView - {self.detachment}')
-        self.logger.setLevel(logging.DEBUG)
 
         force = force.selections.getchildren()
         self.detachment_choice = ""
 
-        self.enumerated_unit_categories = {
-            "Epic Hero": ("EH", []),
-            "Character": ("CH", []),
-            "Battleline": ("BL", []),
-            "Infantry": ("IN", []),
-            "Swarm": ("SW", []),
-            "Mounted": ("MO", []),
-            "Beast": ("BE", []),
-            "Monster": ("MS", []),
-            "Vehicle": ("VE", []),
-            "Drone": ("DR", []),
-            "Dedicated Transport": ("DT", []),
-            "Fortification": ("FT", []),
-            "Allied Units": ("AU", []),
-        }
+        self.enumerated_unit_categories = {name: (short_name, []) for name, short_name in UNIT_CATEGORIES}
 
-        self.__dispatch_selections(force)
+        self.__dispatch_selections(force, digests, previous_units or {})
+
+    @cached_property
+    def sorted_units(self) -> Dict[str, List[Unit]]:
+        """
+        Units of every category in print order (by name, stable), sorted once and shared by all printers
+        """
+        return {
+            name: sorted(units, key=lambda x: x.name) for name, (_, units) in self.enumerated_unit_categories.items()
+        }
 
-    def __dispatch_selections(self, force: List[ObjectifiedElement]) -> None:
+    def __dispatch_selections(
+            self, force: List[ObjectifiedElement], digests: bool, previous_units: Mapping[str, Unit],
+    ) -> None:
         for selection in force:
-            if self.__is_of_type(selection, "Configuration", primary=True):
+            categories = category_index(selection)
+            if categories.get("Configuration", False):
                 self.__dispatch_configuration(selection)
-            else:
-                for key, (_, storage) in self.enumerated_unit_categories.items():
-                    if self.__is_of_type(selection, key, primary=True):
-                        storage.append(self.__parse_unit(selection))
-                        break
-
-    @staticmethod
-    def __is_of_type(selection: ObjectifiedElement, category_name: str, primary: Optional[bool] = None) -> bool:
-        primary = str(primary).lower()
-        return any(
-            category.get("name", "") == category_name and
-            (primary == 'none' or category.get("primary", "") == primary)
-            for category in selection.categories.getchildren()
-        )
+                continue
+
+            priorities = [
+                UNIT_CATEGORY_PRIORITY[name] for name, primary in categories.items()
+                if primary and name in UNIT_CATEGORY_PRIORITY
+            ]
+            if priorities:
+                key = UNIT_CATEGORIES[min(priorities)][0]
+                if not digests:
+                    unit = self.__parse_unit(selection, categories)
+                elif (unit := previous_units.get(digest := selection_digest(selection))) is not None:
+                    # unchanged selection, so the same category, cost and everything else
+                    self.pts += unit.cost
+                    self.reused_units += 1
+                else:
+                    unit = self.__parse_unit(selection, categories)
+                    unit.digest = digest
+                self.enumerated_unit_categories[key][1].append(unit)
 
     def __dispatch_configuration(self, selection: ObjectifiedElement):
         if selection.get("name", "") in {
@@ -86,9 +125,13 @@ class ForceView:
                 self.detachment_choice = children[0].get("name", "")
             return
 
-        self.logger.error(f"Unknown unparsed item during configuration dispatching.", extra={"40k_item": selection.get('name', None)})
+        logger.error(
+            f"Unknown unparsed item during configuration dispatching.",
+            extra={"40k_item": selection.get('name', None), "40k_detachment": self.detachment},
+        )
 
     def __recursive_cost_search(self, unit: objectify.ObjectifiedElement) -> int:
+        # lxml walks the subtree in C, which is faster than summing costs in the selections traversal
         total_cost_pts = 0
         for cost in unit.iter(tag="{*}cost"):
             name = cost.get("name", "").lower().strip()
@@ -99,79 +142,95 @@ class ForceView:
         return total_cost_pts
 
     @staticmethod
-    def __parse_multiplied_unit(name: str, number: int) -> (str, int):
+    def __parse_profiles(selection: objectify.ObjectifiedElement) -> Optional[List[Profile]]:
         """
-        This function is a damn crutch as BS data developers sometimes create units
-        like "2x MV1 Gun Drone" with number=1 (instead of correct version "MV1 Gun Drone" with number=2).
-
-        So here we receive the name and current number and if name starts with "<number>x "
-        then remove the prefix and return number * prefix
-
-        :param name: unit's name
-        :param number: amount of such units
-        :return: if in prefix multiplier exists then Tuple[name without multiplier, number * prefix],
-         original values otherwise
+        :return: 'Unit' profiles of the selection, None if selection has no profiles at all
+        """
+        for profiles in selection.iterchildren(tag="{*}profiles"):
+            result = []
+            for profile in profiles.iterchildren():
+                if profile.get("typeName", None) != 'Unit':
+                    continue
+                characteristics = None
+                for container in profile.iterchildren(tag="{*}characteristics"):
+                    characteristics = [x.text for x in container.iterchildren()]
+                    break
+                result.append(Profile(profile.get("name", ""), profile.get("typeName", None), characteristics))
+            return result
+        return None
+
+    def __enumerate_all_selections(
+            self, selection: objectify.ObjectifiedElement, modifier: int = 1,
+    ) -> Tuple[List[Selection], int]:
+        """
+        Parses nested selections and counts their models in one post-order traversal of the subtree.
+        :param modifier: product of numbers of all parent selections
+        :return: (selections, number of their models, 0 if models are not counted)
         """
-
-        pattern = re.compile(r"(?P<multiplier>\d+)x (?P<unitname>.*)")
-        if match := pattern.match(name):
-            number *= int(match.group('multiplier'))
-            name = match.group('unitname')
-        return name, number
-
-    def __enumerate_all_selections(self, selection: objectify.ObjectifiedElement, modifier: int = 1) -> List[dict]:
         children = selection.iterchildren(tag="{*}selections")
         output = []
+        total_models = 0
         for child in children:
             for element in child.getchildren():
-                number = int(element.get("number", 1))
-                name: str = element.get("name", "<Unparsed selection>")
-                if name == "<Unparsed selection>":
+                raw_number = int(element.get("number", 1))
+                raw_name, name, multiplier = normalize_name(element.get("name", "<Unparsed selection>"))
+                if raw_name == "<Unparsed selection>":
                     logging.error(f"Selection name is not found.", extra={"40k_selection": element})
-                name, number = self.__parse_multiplied_unit(name, number)
-                elements_inside = self.__enumerate_all_selections(element, modifier=number * modifier)
+                number = raw_number * multiplier
+                elements_inside, models = self.__enumerate_all_selections(element, modifier=number * modifier)
 
                 number //= modifier
 
-                output.append(
-                    {
-                        'name': name,
-                        'number': number,
-                        'children': elements_inside,
-                        'link': element,
-                    }
+                result = Selection(
+                    name=name,
+                    number=number,
+                    type=element.get("type", None),
+                    entry_group_id=element.get("entryGroupId", None),
+                    raw_name=raw_name,
+                    raw_number=raw_number,
+                    categories=category_index(element),
+                    profiles=self.__parse_profiles(element),
+                    children=elements_inside,
                 )
-
-        return output
-
-    def __parse_unit(self, unit: objectify.ObjectifiedElement) -> dict:
-        result = {
-            'name': unit.get("name", "Unparsed Model Name"),
-            'children': self.__enumerate_all_selections(unit),
-            'cost': self.__recursive_cost_search(unit),
-            'link': unit
-        }
-        if result['name'] == "Unparsed Model Name":
+                output.append(result)
+                if self.count_models:
+                    total_models += self.__get_models_amount(result, models)
+
+        return output, total_models
+
+    def __parse_unit(self, unit: objectify.ObjectifiedElement, categories: Dict[str, bool]) -> Unit:
+        name = unit.get("name", "Unparsed Model Name")
+        children, models = self.__enumerate_all_selections(unit)
+        result = Unit(
+            name=name,
+            number=1,  # top-level units are always counted once
+            type=unit.get("type", None),
+            entry_group_id=unit.get("entryGroupId", None),
+            raw_name=name,
+            raw_number=try_parse_int(unit.get("number", 1)) or 1,
+            categories=categories,
+            profiles=self.__parse_profiles(unit),
+            children=children,
+            cost=self.__recursive_cost_search(unit),
+            selection_id=unit.get("id", None),
+        )
+        if result.name == "Unparsed Model Name":
             logging.error(f"Unit name is not found.", extra={"40k_unit": unit})
-        result['models'] = self.__get_models_amount(result)
+        if self.count_models:
+            result.models = self.__get_models_amount(result, models)
 
         return result
 
-    def __get_models_amount(self, unit: dict) -> int:
-        utype = unit['link'].get('type', 'model')
-        if is_upgrade(unit['link']):
+    def __get_models_amount(self, unit: Selection, children_models: int) -> int:
+        """
+        :param children_models: models of all nested selections, already counted during the traversal
+        """
+        if unit.upgrade:
             return 0
 
-        if utype == 'unit':
-            number = sum(self.__get_models_amount(x) for x in unit['children'])
-            self.logger.debug(f'get_models_amount: {unit["name"]}: {number}')
-            return number
-
-        if hasattr(unit, 'selection'):
-            number = int(unit.selection.get('number', 1))
-        else:
-            number = int(unit.get('number', 1))
-        if unit.get('children', None):
-            number += sum(self.__get_models_amount(x) for x in unit['children'])
-        self.logger.debug(f'get_models_amount: {unit["name"]}: {number}')
+        number = children_models
+        if (unit.type or 'model') != 'unit':
+            number += unit.number
+        if self.options.debug:
+            logger.debug(f'{self.detachment}: get_models_amount: {unit.name}: {number}')
         return number
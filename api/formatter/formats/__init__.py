@@ -1,4 +1,68 @@
-from .format_printer import DefaultPrinter
-from .rus import RussianTournamentsPrinter
-from .wtc_printer import WTCPrinter
-from .gw_printer import GWPrinter
\ No newline at end of file
+import os
+
+from typing import Dict, FrozenSet, Iterable, Optional, List, TYPE_CHECKING
+
+from ..extensions import FormatterOptions, SECONDARIES
+from ..utils import FormatterException
+
+if TYPE_CHECKING:
+    from .template import TemplatePrinter
+
+# formats defined by data files, a new format only needs a new definitions/<name>.yaml, see template.py.
+# Definitions are compiled on first use of the format, to keep cold start fast.
+DEFINITIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "definitions")
+DEFINITION_SUFFIX = ".yaml"
+TEMPLATES = tuple(sorted(
+    x[:-len(DEFINITION_SUFFIX)] for x in os.listdir(DEFINITIONS_DIR) if x.endswith(DEFINITION_SUFFIX)
+))
+# formats of 'all' in the order of the answer: the original ones first
+ORIGINAL_FORMATS = ('default', 'wtc', 'rus', 'gw')
+ALL_FORMATS = tuple(dict.fromkeys([*ORIGINAL_FORMATS, *TEMPLATES]))
+
+_instances: Dict[str, 'TemplatePrinter'] = {}
+
+
+def parse_formats(value: str) -> Optional[List[str]]:
+    """
+    Parses 'formats' option.
+    :return: list of requested formats for 'all' or comma-separated list of formats, None for a single format
+    """
+    if value == 'all':
+        return list(ALL_FORMATS)
+    if ',' not in value:
+        return None
+
+    result = []
+    for print_format in (x.strip() for x in value.split(',')):
+        if print_format not in ALL_FORMATS:
+            raise FormatterException(f"Unknown format: {print_format}. Available formats: {', '.join(ALL_FORMATS)}.")
+        if print_format not in result:
+            result.append(print_format)
+    return result
+
+
+def get_printer(print_format: str) -> 'TemplatePrinter':
+    """
+    :return: shared printer of the format, default printer for unknown formats
+    """
+    if print_format not in ALL_FORMATS:
+        print_format = 'default'
+    printer = _instances.get(print_format, None)
+    if printer is None:
+        from .template import TemplatePrinter
+        printer = TemplatePrinter.load(print_format)
+        _instances[print_format] = printer
+    return printer
+
+
+def required_data(print_formats: Iterable[str], options: FormatterOptions) -> FrozenSet[str]:
+    """
+    :return: data the roster has to be parsed with to be printed in all given formats
+    """
+    result = frozenset()
+    if options.debug:
+        result |= {SECONDARIES}  # debug info is collected while counting secondaries
+    for print_format in print_formats:
+        result |= get_printer(print_format).required_data(options)
+    return result
+
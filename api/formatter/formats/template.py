@@ -0,0 +1,583 @@
+"""
+Output formats defined by data files in definitions/, so a new format is a new <name>.yaml there.
+
+A definition has these keys (see default.yaml and gw.yaml):
+    extends: format whose keys are used unless they are given here, mappings are merged one level deep
+    header: lines before the forces
+    forces:
+        separate: whether forces are separated by an empty line
+        header: lines before the units of every force
+        sections: groups of units, each with
+            categories: list of unit categories (see forceview.UNIT_CATEGORIES), 'rest' for the categories
+             not listed in other sections or 'each' for a section per category
+            title, after: lines before and after the units of the section
+            always: print the section even if it has no units
+        unit: lines of every unit
+    selections: how selections of a unit are rendered into its {selections} field
+        separator: between selections of the same level
+        item: selection with its {indent}, {bullet} and the {selection} text
+        bullets: bullet of the first selection and of the rest
+        indent: repeated for every level of nesting
+        children: appended to the selection text if it has visible children, e.g. " ({children})"
+    footer: lines after the forces, the last one is not finished with a line break
+
+A line is a format string with fields of its scope (ROSTER_FIELDS, FORCE_FIELDS, UNIT_FIELDS),
+a list of parts (format strings or {text, when} / {text, unless}) or a {rule: length, char} separator.
+Lines can be grouped as {when, lines} / {unless, lines}. Conditions are formatter options
+or 'selections' (unit has visible selections) in unit lines.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import re
+import string
+import threading
+
+from collections import Counter
+from functools import lru_cache
+from dataclasses import fields
+from typing import Any, Callable, Collection, Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple
+
+import yaml
+
+from . import DEFINITIONS_DIR, DEFINITION_SUFFIX
+from ..extensions import FormatterOptions, SECONDARIES, MODEL_COUNTS
+from ..forceview import ForceView, UNIT_CATEGORIES
+from ..model import Selection
+from ..rosterview import RosterView
+from ..utils import FormatterException
+from .writer import RosterWriter
+
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def _secondary(name: str, position: int) -> Callable[[RosterView], Any]:
+    return lambda roster: roster.secondaries[name][position]
+
+
+ROSTER_FIELDS: Dict[str, Callable[[RosterView], Any]] = {
+    'roster_name': lambda x: x.name,
+    'factions': lambda x: ', '.join(x.factions),
+    'pts_total': lambda x: x.pts_total,
+    'units_count': lambda x: x.units_count,
+    'detachment_rules': lambda x: x.forces[0].detachment_choice,
+    'character_units': _secondary('characters', 0),
+    'character_models': _secondary('characters', 1),
+    'vehicle_monster_models': _secondary('bring it down', 0),
+    'vehicle_monster_points': _secondary('bring it down', 1),
+}
+FORCE_FIELDS: Dict[str, Callable[[ForceView], Any]] = {
+    'detachment': lambda x: x.detachment,
+    'detachment_choice': lambda x: x.detachment_choice,
+    'catalogue': lambda x: x.catalogue,
+    'pts': lambda x: x.pts,
+}
+# filled for every unit by TemplatePrinter in this order, index is 1-based within the unit category
+UNIT_FIELDS = ('name', 'cost', 'models', 'short_name', 'index', 'selections')
+UNIT_CONDITIONS = frozenset({'selections'})
+SELECTION_FIELDS = frozenset({'indent', 'bullet', 'selection'})
+
+# data the roster has to be parsed with to fill a field, see extensions.ALL_DATA
+FIELD_DATA = {
+    'character_units': SECONDARIES,
+    'character_models': SECONDARIES,
+    'vehicle_monster_models': SECONDARIES,
+    'vehicle_monster_points': SECONDARIES,
+    'models': MODEL_COUNTS,
+}
+# options lines can be conditioned on, debug doesn't change the output
+OPTIONS = tuple(x.name for x in fields(FormatterOptions) if x.name != 'debug')
+# format spec of a field, without nested fields and quotes
+SPEC_PATTERN = re.compile(r"[^{}'\"\\]*")
+
+DEFINITION_KEYS = frozenset({'header', 'forces', 'selections', 'footer'})
+FORCES_KEYS = frozenset({'separate', 'header', 'sections', 'unit'})
+SECTION_KEYS = frozenset({'categories', 'title', 'after', 'always'})
+SELECTIONS_KEYS = frozenset({'separator', 'item', 'bullets', 'indent', 'children'})
+
+Condition = Tuple[str, bool]  # (name, expected value)
+Segments = List[Tuple[Optional[Condition], str]]  # parts of a line: format strings with their conditions
+Template = Callable[..., str]  # compiled format string filled with fields in the order of the scope, see _compile_template
+# (names of the conditions, their values -> compiled format string of all lines printed with them or None)
+Block = Tuple[Tuple[str, ...], Dict[Tuple[bool, ...], Optional[Template]]]
+
+NO_FLAGS: Dict[str, bool] = {}
+
+
+def load_definition(name: str, directory: str = DEFINITIONS_DIR, extended_by: Tuple[str, ...] = ()) -> dict:
+    """
+    :return: definition of the format with the definitions it extends merged in
+    """
+    if name in extended_by:
+        raise FormatterException(f"Format {name} extends itself.")
+    try:
+        with open(os.path.join(directory, name + DEFINITION_SUFFIX), encoding='utf-8') as file:
+            definition = yaml.load(file, Loader=_Loader)
+    except FileNotFoundError:
+        raise FormatterException(f"Unknown format: {name}.")
+    if not isinstance(definition, dict):
+        raise FormatterException(f"Definition of format {name} is not a mapping.")
+
+    base = definition.pop('extends', None)
+    if base is None:
+        return definition
+    result = load_definition(base, directory, extended_by + (name,))
+    for key, value in definition.items():
+        if isinstance(value, dict) and isinstance(result.get(key, None), dict):
+            value = {**result[key], **value}
+        result[key] = value
+    return result
+
+
+def _field_names(template: str) -> Set[str]:
+    return {x for _, x, _, _ in string.Formatter().parse(template) if x is not None}
+
+
+def _field(name: str, spec: str, conversion: Optional[str]) -> str:
+    """
+    :return: replacement field as it's written in a format string
+    """
+    return f"{{{name}{'!' + conversion if conversion else ''}{':' + spec if spec else ''}}}"
+
+
+@lru_cache(maxsize=None)
+def _compile_template(template: str, parameters: Tuple[str, ...]) -> Template:
+    """
+    Replaces fields of a checked format string (names of the parameters, see _CompiledFormat.__template)
+    with their positions among the parameters, so it's filled from positional arguments without looking names up.
+    :return: str.format of the result
+    """
+    pieces = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        pieces.append(literal.replace('{', '{{').replace('}', '}}'))
+        if field is not None:
+            pieces.append(_field(str(parameters.index(field)), spec, conversion))
+    return ''.join(pieces).format
+
+
+def _split_template(template: str, field: str) -> Optional[Tuple[str, str]]:
+    """
+    :return: format strings before and after the only plain {field} in the template, None if it's not there
+    """
+    before, after, found = [], [], 0
+    for literal, name, spec, conversion in string.Formatter().parse(template):
+        target = after if found else before
+        target.append(literal.replace('{', '{{').replace('}', '}}'))
+        if name == field and not spec and not conversion:
+            found += 1
+        elif name is not None:
+            target.append(_field(name, spec, conversion))
+    if found != 1:
+        return None
+    return ''.join(before), ''.join(after)
+
+
+def _visible_selections(selections: List[Selection], options: FormatterOptions) -> List[Selection]:
+    if options.hide_basic_selections:
+        return options.selector_checker.visible_selections(selections)
+    return selections
+
+
+def _block_template(block: Block, flags: Mapping[str, bool]) -> Optional[Template]:
+    names, variants = block
+    if not names:
+        return variants[()]
+    if len(names) == 1:
+        return variants[(flags[names[0]],)]
+    return variants[tuple(flags[x] for x in names)]
+
+
+def _write_block(writer: RosterWriter, block: Block, context: Sequence[Any], flags: Mapping[str, bool]) -> None:
+    """
+    :param context: values of the fields of the scope in its order
+    """
+    # writing lines joined with '\n' at once is the same as writing them one by one
+    if (template := _block_template(block, flags)) is not None:
+        writer.line(template(*context))
+
+
+class _SelectionStyle:
+    def __init__(self, definition: Mapping[str, Any]):
+        self.separator: str = definition.get('separator', ", ")
+        self.item: str = definition.get('item', "{selection}")
+        self.bullets: Tuple[str, ...] = tuple(definition.get('bullets', ("", "")))
+        self.indent: str = definition.get('indent', "")
+        self.children: str = definition.get('children', " ({children})")
+
+        # text around {children} and {selection}, which are concatenated instead of formatting the whole template
+        self.children_affixes = _split_template(self.children, 'children')
+        self.item_affixes = _split_template(self.item, 'selection')
+
+    def compile(self) -> Callable[[List[Selection], FormatterOptions], str]:
+        """
+        :return: function rendering visible selections of a unit (in print order, see Selection.sorted_children)
+         with the style settings bound as local variables
+        """
+        separator, indent, (first, other) = self.separator, self.indent, self.bullets
+        children_prefix, children_suffix = (x.format() for x in self.children_affixes)
+        item_prefix, item_suffix = self.item_affixes
+        # items are the selection texts as they are, nothing to add
+        plain = not item_prefix and not item_suffix
+        # text of a selection depends on its level only if items are indented
+        by_level = bool(indent) and 'indent' in _field_names(self.item)
+        # level -> (prefix, suffix) of the first item and of the rest
+        affixes: Dict[int, Tuple[Tuple[str, str], Tuple[str, str]]] = {}
+
+        def level_affixes(level: int) -> Tuple[Tuple[str, str], Tuple[str, str]]:
+            result = affixes.get(level, None)
+            if result is None:
+                fields = [{'indent': indent * level, 'bullet': x} for x in (first, other)]
+                result = affixes[level] = tuple((item_prefix.format_map(x), item_suffix.format_map(x)) for x in fields)
+            return result
+
+        def render(selections: List[Selection], options: FormatterOptions, level: int, rendered: dict) -> str:
+            """
+            :param rendered: selection key (with the level if items are indented) -> its rendered text,
+             shared by all selections of the unit, equal subtrees are rendered once
+            """
+            string_selections = []
+            for selection in selections:
+                key = (selection.key, level) if by_level else selection.key
+                result = rendered.get(key, None)
+                if result is None:
+                    result = ""
+                    if (number := selection.number) != 1:
+                        result = f"{number}x"
+                    name = selection.name
+                    if name is None:
+                        logging.warning("Unit selection name not parsed", extra={'selection': selection})
+                        name = "<Unparsed Name>"
+                    result += name
+                    if children := _visible_selections(selection.sorted_children, options):
+                        result += children_prefix + render(children, options, level + 1, rendered) + children_suffix
+                    rendered[key] = result
+                string_selections.append(result)
+
+            # collapsing equivalent units:
+            counter = Counter(string_selections)
+            string_selections = [f"{'' if value == 1 else str(value) + 'x'}{key}" for key, value in counter.items()]
+            if not plain and string_selections:
+                (first_prefix, first_suffix), (prefix, suffix) = level_affixes(level)
+                string_selections[1:] = [prefix + x + suffix for x in string_selections[1:]]
+                string_selections[0] = first_prefix + string_selections[0] + first_suffix
+            return separator.join(string_selections)
+
+        return lambda selections, options: render(selections, options, 1, {})
+
+
+class _Section:
+    __slots__ = ('categories', 'title', 'after', 'always')
+
+    def __init__(self, categories: Optional[Tuple[str, ...]], title: Block, after: Block, always: bool):
+        self.categories = categories  # None for a section per category
+        self.title = title
+        self.after = after
+        self.always = always
+
+
+class _CompiledFormat:
+    """
+    Definition with conditions on formatter options resolved, for one combination of their values.
+    """
+
+    def __init__(self, name: str, definition: Mapping[str, Any], options: Mapping[str, bool]):
+        self.name = name
+        self.options = options
+        self.fields: Set[str] = set()  # fields used by the lines that can be printed
+
+        self.__check_keys(definition, DEFINITION_KEYS, "")
+        forces = definition.get('forces', {})
+        self.__check_keys(forces, FORCES_KEYS, "forces")
+
+        self.header = self.__block(definition.get('header', []), ROSTER_FIELDS)
+        self.footer = self.__block(definition.get('footer', []), ROSTER_FIELDS)
+        self.separate_forces = bool(forces.get('separate', False))
+        self.force_header = self.__block(forces.get('header', []), FORCE_FIELDS)
+        self.sections = self.__sections(forces.get('sections', [{'categories': 'each'}]))
+        unit = self.__block(forces.get('unit', []), UNIT_FIELDS, UNIT_CONDITIONS)
+        # format strings of a unit without and with visible selections, the only condition of unit lines
+        self.unit = tuple(_block_template(unit, {'selections': x}) for x in (False, True))
+
+        # visible selections are only looked up if unit lines use them
+        self.unit_selections = 'selections' in self.fields
+        self.required_data = frozenset(FIELD_DATA[x] for x in self.fields if x in FIELD_DATA)
+
+    def __error(self, message: str) -> FormatterException:
+        return FormatterException(f"Format {self.name}: {message}")
+
+    def __check_keys(self, value: Any, allowed: FrozenSet[str], where: str) -> None:
+        if not isinstance(value, dict):
+            raise self.__error(f"{where or 'definition'} has to be a mapping.")
+        if unknown := set(value) - allowed:
+            raise self.__error(f"unknown keys {', '.join(sorted(unknown))} in {where or 'definition'}.")
+
+    def __condition(self, item: Mapping[str, Any], conditions: FrozenSet[str]) -> Tuple[bool, Optional[Condition]]:
+        """
+        :return: (whether the item can be printed with the options, condition left to check while printing)
+        """
+        if 'when' in item:
+            name, expected = item['when'], True
+        elif 'unless' in item:
+            name, expected = item['unless'], False
+        else:
+            return True, None
+
+        if name in self.options:
+            return self.options[name] == expected, None
+        if name in conditions:
+            self.fields.add(name)
+            return True, (name, expected)
+        raise self.__error(f"unknown condition {name}.")
+
+    def __template(self, text: Any, scope: Collection[str]) -> str:
+        if not isinstance(text, str):
+            raise self.__error(f"{text!r} is not a string.")
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise self.__error(f"invalid format string {text!r}: {e}")
+        for _, field, spec, conversion in parsed:
+            if field is None:
+                continue
+            if field not in scope:
+                raise self.__error(f"unknown field {{{field}}} in {text!r}.")
+            if not SPEC_PATTERN.fullmatch(spec) or conversion not in (None, 'r', 's', 'a'):
+                raise self.__error(f"unsupported format of field {{{field}}} in {text!r}.")
+            self.fields.add(field)
+        return text
+
+    def __line(self, line: Any, scope: Collection[str], conditions: FrozenSet[str]) -> Segments:
+        if isinstance(line, dict):
+            if set(line) - {'rule', 'char'}:
+                raise self.__error(f"unknown line {line!r}.")
+            text = str(line.get('char', "+")) * int(line['rule'])
+            return [(None, text.replace('{', '{{').replace('}', '}}'))]
+
+        segments: Segments = []
+        for part in line if isinstance(line, list) else [line]:
+            condition = None
+            if isinstance(part, dict):
+                if set(part) - {'text', 'when', 'unless'} or 'text' not in part:
+                    raise self.__error(f"unknown line part {part!r}.")
+                printed, condition = self.__condition(part, conditions)
+                if not printed:
+                    continue
+                part = part['text']
+            segments.append((condition, self.__template(part, scope)))
+        return segments
+
+    def __block(self, lines: Any, scope: Collection[str], conditions: FrozenSet[str] = frozenset()) -> Block:
+        """
+        Block is compiled into a format string of all its lines for every combination of the conditions
+        left to check while printing, so it's formatted at once.
+        """
+        lines = self.__lines(lines, scope, conditions)
+        names = tuple(sorted({
+            condition[0]
+            for line_conditions, segments in lines
+            for condition in [*line_conditions, *(x for x, _ in segments)] if condition is not None
+        }))
+
+        def holds(condition: Optional[Condition], flags: Mapping[str, bool]) -> bool:
+            return condition is None or flags[condition[0]] == condition[1]
+
+        variants = {}
+        for values in itertools.product((False, True), repeat=len(names)):
+            flags = dict(zip(names, values))
+            printed = [
+                ''.join(x for condition, x in segments if holds(condition, flags))
+                for line_conditions, segments in lines if all(holds(x, flags) for x in line_conditions)
+            ]
+            variants[values] = _compile_template('\n'.join(printed), tuple(scope)) if printed else None
+        return names, variants
+
+    def __lines(
+            self,
+            lines: Any,
+            scope: Collection[str],
+            conditions: FrozenSet[str],
+            outer: Tuple[Condition, ...] = (),
+    ) -> List[Tuple[Tuple[Condition, ...], Segments]]:
+        """
+        :return: lines with the conditions they are printed on
+        """
+        if not isinstance(lines, list):
+            raise self.__error(f"{lines!r} is not a list of lines.")
+        result = []
+        for line in lines:
+            if isinstance(line, dict) and 'lines' in line:
+                if set(line) - {'lines', 'when', 'unless'}:
+                    raise self.__error(f"unknown group {line!r}.")
+                printed, condition = self.__condition(line, conditions)
+                if printed:
+                    inner = outer + ((condition,) if condition else ())
+                    result += self.__lines(line['lines'], scope, conditions, inner)
+            else:
+                result.append((outer, self.__line(line, scope, conditions)))
+        return result
+
+    def __sections(self, sections: Any) -> List[_Section]:
+        if not isinstance(sections, list):
+            raise self.__error("forces.sections has to be a list.")
+        known = [name for name, _ in UNIT_CATEGORIES]
+        listed = set()
+        for section in sections:
+            self.__check_keys(section, SECTION_KEYS, "forces.sections")
+            categories = section.get('categories', 'each')
+            if isinstance(categories, list):
+                if unknown := set(categories) - set(known):
+                    raise self.__error(f"unknown unit categories {', '.join(sorted(unknown))}.")
+                listed.update(categories)
+            elif categories not in ('each', 'rest'):
+                raise self.__error(f"categories of a section are a list, 'each' or 'rest', not {categories!r}.")
+
+        result = []
+        for section in sections:
+            categories = section.get('categories', 'each')
+            if categories == 'each':
+                categories = None
+            elif categories == 'rest':
+                categories = tuple(x for x in known if x not in listed)
+            result.append(_Section(
+                tuple(categories) if categories is not None else None,
+                self.__block(section.get('title', []), FORCE_FIELDS),
+                self.__block(section.get('after', []), FORCE_FIELDS),
+                bool(section.get('always', False)),
+            ))
+        return result
+
+
+class TemplatePrinter:
+    """
+    Printer of a format defined by a data file. The definition is compiled once for every combination
+    of formatter options it's printed with, so printing a roster only fills prepared format strings.
+    Combinations are compiled on first use, the default one (all options off) when the format is loaded,
+    which checks the definition. Lines printed only with other options are checked on first use of these options.
+    One instance per format is shared by all requests, see formats.get_printer.
+    """
+
+    def __init__(self, name: str, definition: Mapping[str, Any]):
+        self.name = name
+        selections = definition.get('selections', {})
+        if not isinstance(selections, dict) or set(selections) - SELECTIONS_KEYS:
+            raise FormatterException(f"Format {name}: selections has to be a mapping of {', '.join(SELECTIONS_KEYS)}.")
+        style = _SelectionStyle(selections)
+        if len(style.bullets) != 2:
+            raise FormatterException(f"Format {name}: selections.bullets has to be a list of two bullets.")
+        if unknown := _field_names(style.item) - SELECTION_FIELDS:
+            raise FormatterException(f"Format {name}: unknown fields {', '.join(sorted(unknown))} in selections.item.")
+        if style.children_affixes is None or _field_names(style.children) != {'children'}:
+            raise FormatterException(f"Format {name}: selections.children has to have one {{children}} field only.")
+        if style.item_affixes is None:
+            raise FormatterException(f"Format {name}: selections.item has to have one {{selection}} field.")
+        self.render_selections = style.compile()
+
+        self.__definition = definition
+        self.__lock = threading.Lock()
+        self.__compiled: Dict[Tuple[bool, ...], _CompiledFormat] = {}
+        self.__compile((False,) * len(OPTIONS))
+
+    @classmethod
+    def load(cls, name: str, directory: str = DEFINITIONS_DIR) -> TemplatePrinter:
+        return cls(name, load_definition(name, directory))
+
+    def __compile(self, values: Tuple[bool, ...]) -> _CompiledFormat:
+        with self.__lock:
+            compiled = self.__compiled.get(values, None)
+            if compiled is None:
+                compiled = _CompiledFormat(self.name, self.__definition, dict(zip(OPTIONS, values)))
+                self.__compiled[values] = compiled
+            return compiled
+
+    def __compiled_for(self, options: FormatterOptions) -> _CompiledFormat:
+        values = tuple(bool(getattr(options, x)) for x in OPTIONS)
+        compiled = self.__compiled.get(values, None)
+        if compiled is None:
+            compiled = self.__compile(values)
+        return compiled
+
+    def required_data(self, options: FormatterOptions) -> FrozenSet[str]:
+        """
+        :return: data the printed fields need with given options, see extensions.ALL_DATA
+        """
+        return self.__compiled_for(options).required_data
+
+    def print(self, roster: RosterView) -> str:
+        compiled = self.__compiled_for(roster.options)
+        context = [ROSTER_FIELDS[name](roster) if name in compiled.fields else None for name in ROSTER_FIELDS]
+
+        writer = RosterWriter()
+        _write_block(writer, compiled.header, context, NO_FLAGS)
+
+        # forces are printed without line breaks after the last one
+        forces = writer.checkpoint()
+        for i, force in enumerate(roster.forces):
+            if i and compiled.separate_forces:
+                writer.newline()
+            self.__print_force(writer, force, compiled)
+        writer.strip_newlines(forces)
+
+        # every footer line starts a new line, the last one is finished by getvalue
+        if (footer := _block_template(compiled.footer, NO_FLAGS)) is not None:
+            writer.newline()
+            writer.write(footer(*context))
+        return writer.getvalue()
+
+    def __print_force(self, writer: RosterWriter, force: ForceView, compiled: _CompiledFormat) -> None:
+        context = [FORCE_FIELDS[name](force) if name in compiled.fields else None for name in FORCE_FIELDS]
+        _write_block(writer, compiled.force_header, context, NO_FLAGS)
+
+        categories = force.enumerated_unit_categories
+        sorted_units = force.sorted_units
+        for section in compiled.sections:
+            if section.categories is None:
+                groups: Sequence[Sequence[str]] = [(name,) for name, (_, units) in categories.items() if units]
+            else:
+                groups = [section.categories]
+
+            for names in groups:
+                if not section.always and not any(sorted_units[name] for name in names):
+                    continue
+                _write_block(writer, section.title, context, NO_FLAGS)
+                self.__print_units(writer, force, compiled, names)
+                _write_block(writer, section.after, context, NO_FLAGS)
+
+    def __print_units(
+            self, writer: RosterWriter, force: ForceView, compiled: _CompiledFormat, names: Sequence[str],
+    ) -> None:
+        """
+        Prints units of the categories, the hottest loop of the printer.
+        Rendered selections of units with a digest are kept on the unit (see Unit.rendered),
+        so units reused by the next version of the roster aren't rendered again.
+        """
+        options = force.options
+        templates = compiled.unit
+        with_selections = compiled.unit_selections
+        render_selections = self.render_selections
+        rendered_key = (self.name, options.hide_basic_selections)
+        for category in names:
+            short_name = force.enumerated_unit_categories[category][0]
+            for index, unit in enumerate(force.sorted_units[category], 1):
+                name = unit.name
+                if name is None:
+                    name = '<Unparsed Unit Name>'
+                    logging.warning("Unit name not parsed", extra={'unit': unit})
+
+                selections = ""
+                visible = False
+                if with_selections:
+                    if unit.rendered is not None and rendered_key in unit.rendered:
+                        visible, selections = unit.rendered[rendered_key]
+                    else:
+                        if visible_selections := _visible_selections(unit.sorted_children, options):
+                            visible = True
+                            selections = render_selections(visible_selections, options)
+                        if unit.digest is not None:
+                            if unit.rendered is None:
+                                unit.rendered = {}
+                            unit.rendered[rendered_key] = (visible, selections)
+                if (template := templates[visible]) is not None:
+                    # arguments in the order of UNIT_FIELDS
+                    writer.line(template(name, unit.cost, unit.models, short_name, index, selections))
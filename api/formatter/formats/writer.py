@@ -0,0 +1,52 @@
+from typing import List
+
+
+class RosterWriter:
+    """
+    Accumulates formatted roster as a list of lines which are joined once in getvalue.
+    Every line gets a trailing double whitespace (markdown line break) when it's emitted,
+    so printers never rebuild the whole text.
+    """
+    line_ending = "  "
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.current: List[str] = []  # fragments of the unfinished line
+
+    def write(self, text: str) -> None:
+        """
+        Writes text to the current line, every '\n' in the text finishes a line.
+        """
+        if '\n' not in text:
+            self.current.append(text)
+            return
+
+        first, *middle, last = text.split('\n')
+        self.current.append(first)
+        self.current.append(self.line_ending)
+        self.lines.append(''.join(self.current))
+        if middle:
+            self.lines.extend([x + self.line_ending for x in middle])
+        self.current = [last]
+
+    def line(self, text: str = "") -> None:
+        self.write(text)
+        self.newline()
+
+    def newline(self) -> None:
+        self.current.append(self.line_ending)
+        self.lines.append(''.join(self.current))
+        self.current = []
+
+    def checkpoint(self) -> int:
+        return len(self.lines)
+
+    def strip_newlines(self, checkpoint: int) -> None:
+        """
+        Removes line breaks at the end of the text written after the checkpoint, like str.rstrip('\n').
+        """
+        while len(self.lines) > checkpoint and not ''.join(self.current):
+            self.current = [self.lines.pop()[:-len(self.line_ending)]]
+
+    def getvalue(self) -> str:
+        return '\n'.join(self.lines + [''.join(self.current) + self.line_ending])
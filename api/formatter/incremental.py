@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import hashlib
+
+from typing import Dict, Iterable, Optional
+
+from lxml import etree, objectify
+
+from .model import Unit
+
+DIGEST_SIZE = 16
+
+
+def selection_digest(selection: objectify.ObjectifiedElement) -> str:
+    """
+    Digest of the serialized selection element with its id, costs and the whole subtree,
+    so two versions of a roster have equal digests only for selections nobody touched.
+    Whitespace after the element depends on its neighbours, so it isn't a part of the digest.
+    """
+    return hashlib.blake2b(etree.tostring(selection, with_tail=False), digest_size=DIGEST_SIZE).hexdigest()
+
+
+class UnitIndex:
+    """
+    Parsed units of a roster by digest of their selections (see selection_digest).
+    Stored in the result cache for every roster parsed with UNIT_DIGESTS, the next version of the roster
+    takes units with the same digest from it instead of parsing them again (see ForceView).
+    """
+    __slots__ = ('models_counted', 'units', 'approximate_size')
+
+    def __init__(self, models_counted: bool, units: Dict[str, Unit], approximate_size: int = 0):
+        """
+        :param models_counted: whether the units were parsed with model counts, see ForceView
+        :param approximate_size: memory taken by the units in bytes, for the result cache
+        """
+        self.models_counted = models_counted
+        self.units = units
+        self.approximate_size = approximate_size
+
+    @classmethod
+    def of(cls, units: Iterable[Unit], models_counted: bool, approximate_size: int = 0) -> UnitIndex:
+        return cls(models_counted, {unit.digest: unit for unit in units if unit.digest is not None}, approximate_size)
+
+    def reusable(self, count_models: bool) -> Optional[Dict[str, Unit]]:
+        """
+        :return: units that can be reused by a roster parsed with count_models, None if there are none
+        """
+        if count_models and not self.models_counted:
+            return None
+        return self.units
+
+    def diff(self, current: UnitIndex) -> dict:
+        """
+        Compares units by BattleScribe selection id (by digest for selections without one).
+        :return: numbers of unchanged, changed, added and removed units of the current roster
+        """
+        previous = {unit.selection_id or digest: digest for digest, unit in self.units.items()}
+        unchanged = changed = added = 0
+        for digest, unit in current.units.items():
+            previous_digest = previous.pop(unit.selection_id or digest, None)
+            if previous_digest is None:
+                added += 1
+            elif previous_digest == digest:
+                unchanged += 1
+            else:
+                changed += 1
+        return {'unchanged': unchanged, 'changed': changed, 'added': added, 'removed': len(previous)}
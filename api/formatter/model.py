@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .utils import is_upgrade
+
+
+class Profile:
+    """
+    Profile of a selection. Only 'Unit' profiles are kept, characteristics are stored as text in document order.
+    """
+    __slots__ = ('name', 'type_name', 'characteristics')
+
+    def __init__(self, name: str, type_name: Optional[str], characteristics: Optional[List[Optional[str]]]):
+        self.name = name
+        self.type_name = type_name
+        # None if profile has no <characteristics> at all
+        self.characteristics = characteristics
+
+    def __repr__(self):
+        return f"Profile({self.name!r}, {self.type_name!r})"
+
+
+class Selection:
+    """
+    Parsed BattleScribe selection with everything printers and secondaries need,
+    so the lxml tree can be dropped right after parsing.
+    """
+    __slots__ = (
+        'name', 'number', 'type', 'entry_group_id', 'raw_name', 'raw_number',
+        'categories', 'subtree_categories', 'profiles', 'children', 'key', '_upgrade', '_sorted_children',
+    )
+
+    def __init__(
+            self,
+            name: str,
+            number: int,
+            type: Optional[str],
+            entry_group_id: Optional[str],
+            raw_name: str,
+            raw_number: int,
+            categories: Dict[str, bool],
+            profiles: Optional[List[Profile]],
+            children: List[Selection],
+    ):
+        # name without "<n>x " prefix and number of selections per parent
+        self.name = name
+        self.number = number
+        self.type = type
+        self.entry_group_id = entry_group_id
+        # name and number as written in the roster
+        self.raw_name = raw_name
+        self.raw_number = raw_number
+        # category name -> primary flag
+        self.categories = categories
+        self.profiles = profiles  # None if selection has no <profiles> at all
+        self.children = children
+        # names of categories of the selection and all nested selections
+        self.subtree_categories: FrozenSet[str] = self.__aggregate_categories(categories, children)
+        # everything printers render the subtree from, selections with equal keys are printed the same way
+        self.key: tuple = (name, number, type, entry_group_id is not None, tuple(x.key for x in children))
+        self._upgrade: Optional[bool] = None
+        self._sorted_children: Optional[List[Selection]] = None
+
+    @property
+    def upgrade(self) -> bool:
+        """
+        is_upgrade of the selection, computed once
+        """
+        if self._upgrade is None:
+            self._upgrade = is_upgrade(self)
+        return self._upgrade
+
+    @property
+    def sorted_children(self) -> List[Selection]:
+        """
+        Children in print order (by name, stable), sorted once and shared by all printers
+        """
+        if self._sorted_children is None:
+            children = self.children
+            self._sorted_children = sorted(children, key=lambda x: x.name) if len(children) > 1 else children
+        return self._sorted_children
+
+    @staticmethod
+    def __aggregate_categories(categories: Dict[str, bool], children: List[Selection]) -> FrozenSet[str]:
+        result = set(categories)
+        for child in children:
+            result |= child.subtree_categories
+        return frozenset(result)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r}, number={self.number})"
+
+
+class Unit(Selection):
+    """
+    Top-level selection of a force with its total cost and number of models.
+    """
+    __slots__ = ('cost', 'models', 'selection_id', 'digest', 'secondaries', 'rendered')
+
+    def __init__(self, *args, cost: int = 0, selection_id: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cost = cost
+        self.models = 0
+        # BattleScribe id of the selection and digest of its xml, the digest is only set if the roster
+        # was parsed with UNIT_DIGESTS, see incremental.UnitIndex
+        self.selection_id = selection_id
+        self.digest: Optional[str] = None
+        # contribution to the secondaries, see extensions.unit_secondaries
+        self.secondaries: Optional[tuple] = None
+        # (format, hide_basic_selections) -> (whether any selection is visible, rendered selections),
+        # kept for units with a digest only, see TemplatePrinter
+        self.rendered: Optional[Dict[tuple, Tuple[bool, str]]] = None
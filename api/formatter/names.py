@@ -0,0 +1,34 @@
+import os
+import re
+
+from functools import lru_cache
+from typing import Tuple
+
+# "2x MV1 Gun Drone" -> multiplier 2, name "MV1 Gun Drone"
+MULTIPLIER_PATTERN = re.compile(r"(?P<multiplier>\d+)x (?P<unitname>.*)")
+# maximum number of distinct selection names remembered by the process
+NAME_CACHE_SIZE = int(os.getenv("FORMATTER_NAME_CACHE_SIZE", 4096))
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def normalize_name(raw_name: str) -> Tuple[str, str, int]:
+    """
+    This function is a damn crutch as BS data developers sometimes create units
+    like "2x MV1 Gun Drone" with number=1 (instead of correct version "MV1 Gun Drone" with number=2).
+
+    Same names repeat in every roster, so results are memoized: selections of the same wargear share the string
+    objects of the cached result, which makes printers' sorting and grouping cheaper. Names come from uploads,
+    so they aren't interned with sys.intern, interned strings are never freed; the cache is bounded instead.
+
+    :param raw_name: selection name as written in the roster
+    :return: (raw name, name without "<number>x " prefix, prefix multiplier or 1)
+    """
+    if match := MULTIPLIER_PATTERN.match(raw_name):
+        # the same object as the name of selections written without the prefix
+        return raw_name, normalize_name(match.group('unitname'))[0], int(match.group('multiplier'))
+    return raw_name, raw_name, 1
+
+
+def name_cache_stats() -> dict:
+    info = normalize_name.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'entries': info.currsize, 'max_size': info.maxsize}
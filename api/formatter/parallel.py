@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Mapping, Optional, Union
+
+from lxml import etree, objectify
+
+from .forceview import ForceView
+from .extensions import FormatterOptions
+from .model import Unit
+
+# number of worker processes building forces of one roster concurrently, 0 or 1 to build them in the request
+# process. Pays off only for rosters with several big forces on a multi-core host,
+# see benchmarks/bench_parallel_forces.py
+FORCE_WORKERS = int(os.getenv("FORMATTER_FORCE_WORKERS", 0))
+# rosters with fewer forces are built in the request process even if FORCE_WORKERS is set
+PARALLEL_MIN_FORCES = int(os.getenv("FORMATTER_PARALLEL_MIN_FORCES", 2))
+
+# worker processes are started by a fork server (spawned where there's none) rather than forked from the request
+# process: forking a process with other threads running (Azure worker, ASGI thread pool) can deadlock on locks
+# they hold, e.g. of logging or the result cache
+PROCESS_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# number of workers -> pool, requests of other threads may be using any of them, so they are never shut down
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def force_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    :return: process pool with the number of workers shared by all requests of the process, created on first use.
+     Requests use FORCE_WORKERS, so it's one pool per process unless workers are given explicitly.
+    """
+    with _lock:
+        pool = _pools.get(workers, None)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_CONTEXT)
+        return pool
+
+
+def _build_force(content: bytes, options: FormatterOptions, count_models: bool, digests: bool) -> ForceView:
+    return ForceView(objectify.fromstring(content), options, count_models=count_models, digests=digests)
+
+
+class ForceBuilder:
+    """
+    Builds ForceView of every force of a roster, in worker processes if there are enough forces.
+    lxml elements can't be pickled, so forces are sent to workers as serialized xml
+    and parsed ForceViews are sent back. Forces are returned in the order they were added.
+    Forces reusing units of a previous roster are always built in the request process,
+    sending the previous units to workers would cost more than parsing the changed ones.
+    """
+
+    def __init__(
+            self,
+            options: FormatterOptions,
+            count_models: bool,
+            workers: int = FORCE_WORKERS,
+            min_forces: int = PARALLEL_MIN_FORCES,
+            digests: bool = False,
+            previous_units: Optional[Mapping[str, Unit]] = None,
+    ):
+        """
+        :param digests: see ForceView
+        :param previous_units: see ForceView
+        """
+        self.options = options
+        self.count_models = count_models
+        self.digests = digests
+        self.previous_units = previous_units
+        self.workers = workers if previous_units is None else 0
+        self.min_forces = max(min_forces, 1)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        # built forces, xml of forces waiting for the decision where to build them, or futures of workers
+        self.forces: List[Union[ForceView, bytes, Future]] = []
+
+    def add(self, force: objectify.ObjectifiedElement) -> None:
+        """
+        Force element isn't used after this call, so it can be freed right away (see StreamingRosterReader).
+        """
+        if self.workers < 2:
+            self.forces.append(ForceView(
+                force, self.options,
+                count_models=self.count_models, digests=self.digests, previous_units=self.previous_units,
+            ))
+            return
+
+        self.forces.append(etree.tostring(force))
+        if len(self.forces) >= self.min_forces:
+            if self.pool is None:
+                self.pool = force_pool(self.workers)
+            self.forces = [
+                self.pool.submit(_build_force, x, self.options, self.count_models, self.digests)
+                if isinstance(x, bytes) else x
+                for x in self.forces
+            ]
+
+    def build(self) -> List[ForceView]:
+        """
+        Waits for the workers, exceptions raised while building a force are re-raised here.
+        """
+        result = []
+        for force in self.forces:
+            if isinstance(force, bytes):
+                force = _build_force(force, self.options, self.count_models, self.digests)
+            elif isinstance(force, Future):
+                force = force.result()
+                force.options = self.options  # share the options object as in the serial mode
+            result.append(force)
+        return result
@@ -0,0 +1,134 @@
+import io
+import logging
+
+from typing import IO, Mapping, Optional, TYPE_CHECKING
+
+from .extensions import FormatterOptions, UNIT_DIGESTS
+from .cache import result_cache
+from .formats import get_printer, parse_formats, required_data
+from .timings import TIMINGS_ENABLED, request_timings, span, record
+
+if TYPE_CHECKING:
+    from .incremental import UnitIndex
+
+
+def format_upload(filename: str, stream: IO[bytes], options: Mapping[str, str]) -> dict:
+    """
+    Formats the uploaded roster as the form options ask, shared by the Azure function and the ASGI app.
+    :param filename: name of the uploaded .ros or .rosz file
+    :param stream: seekable binary stream with file content
+    :param options: form fields of the request
+    :return: answer of the formatter
+    """
+    # lxml and the parser are imported by the first request, not when the function app loads
+    from .rosterview import RosterView
+
+    show_timings = options.get('timings', 'off') == 'on'
+    with request_timings(TIMINGS_ENABLED or show_timings) as timings:
+        length = stream.seek(0, io.SEEK_END)
+        stream.seek(0)
+        logging.debug(f"Received file {filename} with length {length} bytes")
+
+        record("bytes", length)
+        formatter_options = FormatterOptions(**options)
+        print_format = options.get('formats', 'default')
+        print_formats = parse_formats(print_format)
+        # only what the requested printers use is computed
+        roster_data = required_data(print_formats or [print_format], formatter_options)
+        # the answer's id of a previous version of the roster, its unchanged units are reused
+        previous = options.get('previous', None) or None
+        incremental = previous is not None or options.get('incremental', 'off') == 'on'
+        # the digest is the cache key and the answer's id, hashing the roster is wasted work without both
+        digest = None
+        if result_cache.enabled or incremental:
+            with span("digest"):
+                digest = RosterView.content_digest(filename, stream)
+        previous_units = None
+        if incremental:
+            roster_data |= {UNIT_DIGESTS}
+            if previous is not None:
+                previous_units = result_cache.units(previous)
+        parsed = []
+
+        def parse() -> RosterView:
+            roster_view = RosterView.from_upload(
+                filename, stream, options=formatter_options, required_data=roster_data, previous_units=previous_units,
+            )
+            logging.debug("Roster successfully parsed.")
+            if incremental:
+                result_cache.store_units(digest, roster_view.unit_index)
+            parsed.append(roster_view)
+            return roster_view
+
+        roster = []
+
+        def get_roster() -> RosterView:
+            # looked up in the cache or parsed once per request, only if some format isn't rendered yet;
+            # printers don't modify the roster, so all formats are rendered from the same instance
+            if not roster:
+                roster.append(result_cache.roster(digest, formatter_options, roster_data, parse))
+            return roster[0]
+
+        def render(current_format: str) -> dict:
+            roster_view = get_roster()
+            with span(f"print:{current_format}"):
+                result = {'info': get_printer(current_format).print(roster_view)}
+            if formatter_options.debug:
+                result['debug'] = roster_view.debug_info
+            return result
+
+        def render_cached(current_format: str) -> dict:
+            return result_cache.rendered(
+                digest, formatter_options, current_format, lambda: render(current_format)
+            )
+
+        if print_formats is None:
+            answer = dict(render_cached(print_format))
+        else:
+            rendered = {x: render_cached(x) for x in print_formats}
+            answer = {'info': {x: value['info'] for x, value in rendered.items()}}
+            if formatter_options.debug:
+                answer['debug'] = next(iter(rendered.values()))['debug']
+        if incremental:
+            if parsed:
+                current_units = parsed[0].unit_index
+            elif (current_units := result_cache.units(digest)) is None:
+                # the answer was rendered for a request that didn't index the roster
+                current_units = get_roster().unit_index
+                result_cache.store_units(digest, current_units)
+            answer['id'] = digest
+            answer['incremental'] = _incremental_report(previous, previous_units, current_units, parsed)
+        if show_timings:
+            answer['timings'] = timings.as_dict()
+
+    return answer
+
+
+def _incremental_report(
+        previous: Optional[str], previous_units: Optional['UnitIndex'], current_units: 'UnitIndex', parsed: list,
+) -> dict:
+    """
+    :param previous_units: units of the previous version, None if it's not given or not cached anymore
+    :param parsed: RosterView parsed for the request, empty if the answer was cached
+    :return: units compared to the previous version by selection id and the work done for the request
+    """
+    report = {'previous': previous, 'found': previous_units is not None}
+    if previous_units is not None:
+        report.update(previous_units.diff(current_units))
+    reused = parsed[0].reused_units if parsed else 0
+    report['parsed'] = parsed[0].units_count - reused if parsed else 0
+    report['reused'] = reused
+    return report
+
+
+def error_answer(e: Exception) -> dict:
+    message = (
+        f"Exception occurred: \n\n"
+        f"{str(e)} \n\n"
+        f"If you don't know the reason for the exception, "
+        f"please consider submitting the bug and your roster "
+        f"here: https://github.com/maybe-hello-world/40k-roster-formatter/issues "
+        f"or to my email: maybe.hello.world@gmail.com, or Discord: @maybehelloworld\n\n"
+        f"Thanks, and my apologies for this :)"
+    )
+    return {'info': message, 'debug': message}
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 
+from functools import cached_property
+
 from .forceview import ForceView
+from .parallel import ForceBuilder, FORCE_WORKERS
+from .streaming import StreamingRosterReader, SizeLimitedStream, MAX_ROSTER_SIZE
 from .utils import FormatterException
-from .extensions import FormatterOptions, count_secondaries
+from .extensions import (
+    FormatterOptions, count_secondaries, number_of_units, SECONDARIES, MODEL_COUNTS, ALL_DATA, UNIT_DIGESTS,
+)
+from .incremental import UnitIndex
+from .timings import span, record, recording
+
+from io import BytesIO
+from lxml import etree, objectify
+from zipfile import ZipFile, is_zipfile
+from typing import AbstractSet, Mapping, Iterable, List, Optional, Tuple, Union, IO
 
-from lxml import objectify
-from zipfile import ZipFile
-from typing import Mapping
+CHUNK_SIZE = 64 * 1024
 
 
 class RosterView:
@@ -18,19 +30,67 @@ class RosterView:
             input_file = ZipFile(input_file)
             return {name: input_file.read(name) for name in input_file.namelist()}
         else:
-            return {"default": input_file.encode('utf-8')}
+            if isinstance(input_file, str):
+                return {"default": input_file.encode('utf-8')}
+            return {"default": input_file.read()}
 
     @staticmethod
-    def __read_xml(content: dict) -> objectify.ObjectifiedElement:
+    def __open(input_file, zipped: bool = True, max_size: int = MAX_ROSTER_SIZE) -> SizeLimitedStream:
+        """
+        Opens roster xml as a stream without reading it into memory.
+        Only one archive member is decompressed, chunk by chunk, while the parser consumes it.
+        """
+        if not zipped:
+            if isinstance(input_file, str):
+                return SizeLimitedStream(BytesIO(input_file.encode('utf-8')), max_size)
+            return SizeLimitedStream(input_file, max_size, close_stream=False)
+
+        archive = ZipFile(input_file)
+        members = archive.infolist()
+        if len(members) != 1:
+            raise FormatterException(f"Unknown structure of provided rosz archive. Content: {archive.namelist()}")
+        if members[0].file_size > max_size:
+            # declared size can lie, SizeLimitedStream checks the real one
+            raise FormatterException(f"Roster is too big: more than {max_size} bytes after decompression.")
+        return SizeLimitedStream(archive.open(members[0]), max_size)
+
+    @staticmethod
+    def __single_member(content: dict) -> bytes:
         if len(content) != 1:
             exception = FormatterException(f"Unknown structure of provided rosz archive. Content: {content.keys()}")
             raise exception
 
         name: str = next(iter(content))
-        roster: objectify.ObjectifiedElement = objectify.fromstring(content[name])
+        return content[name]
+
+    @staticmethod
+    def __read_xml(content: dict) -> objectify.ObjectifiedElement:
+        roster: objectify.ObjectifiedElement = objectify.fromstring(RosterView.__single_member(content))
 
         return roster
 
+    def __read_forces(
+            self, forces: Iterable[objectify.ObjectifiedElement], workers: int, previous_units: Optional[UnitIndex],
+    ) -> List[ForceView]:
+        self.factions = set()
+        # secondaries are counted from the number of models
+        self.models_counted = bool(self.required_data & {MODEL_COUNTS, SECONDARIES})
+        digests = UNIT_DIGESTS in self.required_data
+        if previous_units is not None and digests:
+            previous_units = previous_units.reusable(self.models_counted)
+        else:
+            previous_units = None
+        builder = ForceBuilder(
+            self.options, self.models_counted, workers, digests=digests, previous_units=previous_units,
+        )
+        for force in forces:
+            self.factions.add(force.attrib.get("catalogueName", "<ERROR: UNPARSED>"))
+            if etree.QName(force).localname == "force":
+                builder.add(force)
+        if "<ERROR: UNPARSED>" in self.factions:
+            logging.error("Unknown faction in roster.", extra={"40k_factions": self.factions})
+        return builder.build()
+
     def __set_reinf_points(self, roster: objectify.ObjectifiedElement):
         pts_limit = [
             x.costLimit.get("value")
@@ -42,12 +102,58 @@ class RosterView:
         reinf_points = pts_limit - self.pts_total
         self.reinf_points = str(reinf_points) if reinf_points > 0 else 'none'
 
-    def __init__(self, file, zipped: bool = True, options: Mapping[str, str] = None):
+    def __init__(
+            self,
+            file,
+            zipped: bool = True,
+            options: Union[Mapping[str, str], FormatterOptions] = None,
+            streaming: bool = False,
+            max_size: int = MAX_ROSTER_SIZE,
+            required_data: AbstractSet[str] = ALL_DATA,
+            force_workers: int = FORCE_WORKERS,
+            previous_units: Optional[UnitIndex] = None,
+    ):
+        """
+        :param file: file-like object with .rosz archive if zipped,
+         roster xml as a string or a binary file-like object otherwise
+        :param zipped: whether file is a zip archive
+        :param options: formatting options as received from the form or already parsed FormatterOptions
+        :param streaming: parse roster with StreamingRosterReader directly from the (decompressed) stream
+         instead of building the whole objectify tree from bytes
+        :param max_size: maximum size of roster xml after decompression, only checked in streaming mode
+        :param required_data: data printers need on top of the selections (see extensions.ALL_DATA),
+         the rest is not computed
+        :param force_workers: number of worker processes building forces concurrently, see parallel.ForceBuilder
+        :param previous_units: units of a previous version of the roster (see unit_index) to reuse,
+         only if UNIT_DIGESTS is in required_data
+        """
         if not options:
             options = {}
+        self.required_data = frozenset(required_data)
+
+        self.options = options if isinstance(options, FormatterOptions) else FormatterOptions(**options)
+        if streaming:
+            # decompression, parsing and force dispatching are interleaved
+            with span("parse"), self.__open(file, zipped, max_size) as stream:
+                reader = StreamingRosterReader(stream)
+                self.forces = self.__read_forces(reader.forces(), force_workers, previous_units)
+                roster = reader.root
+            self.xml_bytes = stream.consumed
+            record("xml_bytes", self.xml_bytes)
+        else:
+            with span("extract"):
+                content = self.__extract(file, zipped)
+            self.xml_bytes = sum(len(x) for x in content.values())
+            record("xml_bytes", self.xml_bytes)
+            with span("parse"):
+                roster = self.__read_xml(content)
+            with span("forces"):
+                self.forces = self.__read_forces(roster.forces.iterchildren(), force_workers, previous_units)
+        if recording():
+            record("units", self.units_count)
+            if UNIT_DIGESTS in self.required_data:
+                record("reused_units", self.reused_units)
 
-        self.options = FormatterOptions(**options)
-        roster = self.__read_xml(self.__extract(file, zipped))
         self.name = roster.attrib.get("name", "")
 
         try:
@@ -60,12 +166,119 @@ class RosterView:
             total_cost = {}
         self.pts_total = total_cost.get("pts", 0)
         self.__set_reinf_points(roster)
-        self.factions = set(x.attrib.get("catalogueName", "<ERROR: UNPARSED>") for x in roster.forces.iterchildren())
-        if "<ERROR: UNPARSED>" in self.factions:
-            logging.error("Unknown faction in roster.", extra={"40k_factions": self.factions})
 
-        forces = (x for x in roster.forces.iterchildren(tag="{*}force"))
-        self.forces = [ForceView(x, self.options) for x in forces]
+    @cached_property
+    def __counted_secondaries(self) -> Tuple[dict, List[str]]:
+        """
+        Counted on first access, so requests that don't show secondaries don't pay for them.
+        Roster has to be parsed with SECONDARIES in required_data, as they depend on model counts.
+        Parsed rosters are shared by requests through the result cache and cached_property has no lock,
+        so threads accessing it at once may both count, but the roster only gets one of the complete results.
+        """
+        if SECONDARIES not in self.required_data:
+            raise FormatterException("Secondaries are not available: roster was parsed without them.")
+        with span("secondaries"):
+            return count_secondaries(self)
+
+    @property
+    def secondaries(self) -> dict:
+        return self.__counted_secondaries[0]
+
+    @property
+    def debug_lines(self) -> List[str]:
+        """
+        Details of secondaries counting, only collected with the debug option
+        """
+        if self.options.debug and SECONDARIES in self.required_data:
+            return self.__counted_secondaries[1]
+        return []
+
+    @cached_property
+    def units_count(self) -> int:
+        return number_of_units(self)
+
+    @property
+    def approximate_size(self) -> int:
+        """
+        Memory taken by the parsed roster in bytes, for the result cache. Parsed selections take
+        0.6-0.85 bytes per byte of roster xml (measured with tracemalloc on generated rosters), so it's the xml size.
+        """
+        return self.xml_bytes
+
+    @property
+    def reused_units(self) -> int:
+        """
+        Units taken from the previous version of the roster instead of being parsed
+        """
+        return sum(x.reused_units for x in self.forces)
+
+    @cached_property
+    def unit_index(self) -> UnitIndex:
+        """
+        Units by digest of their selections, for the next version of the roster.
+        Roster has to be parsed with UNIT_DIGESTS in required_data.
+        """
+        if UNIT_DIGESTS not in self.required_data:
+            raise FormatterException("Unit digests are not available: roster was parsed without them.")
+        return UnitIndex.of(
+            (unit for force in self.forces for _, units in force.enumerated_unit_categories.values() for unit in units),
+            self.models_counted,
+            self.approximate_size,
+        )
+
+    @property
+    def debug_info(self) -> str:
+        return ''.join(f"{x}\n" for x in self.debug_lines)
+
+    @classmethod
+    def from_upload(
+            cls,
+            filename: str,
+            stream: IO[bytes],
+            options: Union[Mapping[str, str], FormatterOptions] = None,
+            required_data: AbstractSet[str] = ALL_DATA,
+            force_workers: int = FORCE_WORKERS,
+            previous_units: Optional[UnitIndex] = None,
+    ) -> RosterView:
+        """
+        Parses uploaded .ros or .rosz file in streaming mode.
+        :param filename: name of the uploaded file, used to tell .ros from .rosz
+        :param stream: seekable binary stream with file content
+        """
+        return cls(
+            stream,
+            zipped=cls.__is_zipped(filename, stream),
+            options=options,
+            streaming=True,
+            required_data=required_data,
+            force_workers=force_workers,
+            previous_units=previous_units,
+        )
+
+    @staticmethod
+    def __is_zipped(filename: str, stream: IO[bytes]) -> bool:
+        if filename.endswith(".ros"):
+            # because users somehow submit binary .ros files (seems like renamed from .rosz)
+            zipped = is_zipfile(stream)
+            stream.seek(0)
+            return zipped
+        elif filename.endswith(".rosz"):
+            return True
+        else:
+            raise FormatterException(
+                "Provided file doesn't end with .ros or .rosz and therefore "
+                "is not a valid BattleScribe file. Please, submit .ros or .rosz file produced by BattleScribe."
+            )
 
-        self.debug_info = ""
-        self.secondaries = count_secondaries(self)
+    @classmethod
+    def content_digest(cls, filename: str, stream: IO[bytes], max_size: int = MAX_ROSTER_SIZE) -> str:
+        """
+        SHA-256 of the decompressed roster xml, so the same roster has the same digest whether it was
+        uploaded as .ros or .rosz. Stream is rewound afterwards and can be parsed with from_upload.
+        """
+        digest = hashlib.sha256()
+        with cls.__open(stream, cls.__is_zipped(filename, stream), max_size) as content:
+            while chunk := content.read(CHUNK_SIZE):
+                digest.update(chunk)
+        stream.seek(0)
+        return digest.hexdigest()
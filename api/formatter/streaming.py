@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+
+from typing import Iterator, Optional, IO
+
+from lxml import etree, objectify
+
+from .utils import FormatterException
+
+# maximum size of the roster xml after decompression, in bytes
+MAX_ROSTER_SIZE = int(os.getenv("FORMATTER_MAX_ROSTER_SIZE", 64 * 1024 * 1024))
+
+
+class SizeLimitedStream:
+    """
+    File-like wrapper that fails as soon as more than `limit` bytes were read from the underlying stream,
+    so zip bombs are rejected after reading at most `limit` bytes instead of being decompressed into memory.
+    """
+
+    def __init__(self, stream: IO[bytes], limit: int = MAX_ROSTER_SIZE, close_stream: bool = True):
+        """
+        :param close_stream: whether closing the wrapper closes the underlying stream,
+         False for streams owned by the caller
+        """
+        self.stream = stream
+        self.limit = limit
+        self.close_stream = close_stream
+        self.consumed = 0
+
+    def read(self, size: int = -1) -> bytes:
+        allowed = self.limit - self.consumed + 1
+        if size is None or size < 0 or size > allowed:
+            size = allowed
+        chunk = self.stream.read(size)
+        self.consumed += len(chunk)
+        if self.consumed > self.limit:
+            raise FormatterException(f"Roster is too big: more than {self.limit} bytes after decompression.")
+        return chunk
+
+    def close(self):
+        if self.close_stream:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class StreamingRosterReader:
+    """
+    Reads roster with iterparse instead of building the whole objectify tree at once.
+
+    Every top-level <force> is yielded as soon as it is parsed, and everything the formatter never reads
+    (rules, info links, publications, non-unit profiles) is dropped from the tree right after it is parsed,
+    so big rosters never keep their descriptions and weapon profiles in memory.
+    Force subtree is freed as soon as the consumer is done with it.
+    Elements are still ObjectifiedElement, so ForceView works with them as with the fully parsed tree.
+    """
+
+    # subtrees that are not used by ForceView, count_secondaries or printers
+    pruned_tags = ("rules", "infoLinks", "publications")
+
+    def __init__(self, source: IO[bytes]):
+        self.source = source
+        self.root: Optional[objectify.ObjectifiedElement] = None
+
+    @staticmethod
+    def __local_name(element: etree.ElementBase) -> str:
+        return etree.QName(element).localname
+
+    @staticmethod
+    def __drop(element: etree.ElementBase) -> None:
+        parent = element.getparent()
+        element.clear()
+        if parent is not None:
+            parent.remove(element)
+
+    @staticmethod
+    def __is_top_level_force(element: etree.ElementBase) -> bool:
+        # roster -> forces -> force, nested forces are left to their parents
+        forces = element.getparent()
+        return forces is not None and forces.getparent() is not None and forces.getparent().getparent() is None
+
+    def forces(self) -> Iterator[objectify.ObjectifiedElement]:
+        """
+        Yields top-level forces one by one. Force is cleared and removed from the tree when the consumer
+        asks for the next one, so the consumer has to copy everything it needs (as ForceView does).
+        After the iteration is finished, self.root contains roster element with its own costs and cost limits.
+        """
+        tags = [f"{{*}}{x}" for x in (*self.pruned_tags, "profile", "force")]
+        context = etree.iterparse(self.source, events=("end",), tag=tags, remove_blank_text=True, huge_tree=True)
+        context.set_element_class_lookup(objectify.ObjectifyElementClassLookup())
+
+        for _, element in context:
+            name = self.__local_name(element)
+            if name in self.pruned_tags:
+                self.__drop(element)
+            elif name == "profile":
+                # only unit profiles are used (wounds for secondaries, unit detection in is_upgrade)
+                if element.get("typeName", None) != "Unit":
+                    self.__drop(element)
+            elif self.__is_top_level_force(element):
+                yield element
+                self.__drop(element)
+
+        self.root = context.root
@@ -0,0 +1,65 @@
+import logging
+import os
+import threading
+
+SENTRY_DSN = os.getenv("SENTRY_DSN")
+# share of requests traced as Sentry transactions, healthchecks are never traced
+TRACES_SAMPLE_RATE = float(os.getenv("SENTRY_TRACES_SAMPLE_RATE", 0.1))
+# verbose logs of the Sentry SDK itself
+SENTRY_DEBUG = os.getenv("SENTRY_DEBUG", "off") == "on"
+# log records of this level and above are kept as breadcrumbs of the next event
+BREADCRUMB_LEVEL = os.getenv("SENTRY_BREADCRUMB_LEVEL", "WARNING").upper()
+# log records of this level and above are sent as events
+EVENT_LEVEL = os.getenv("SENTRY_EVENT_LEVEL", "WARNING").upper()
+
+UNTRACED_TRANSACTIONS = {"healthcheck"}
+
+_initialized = False
+_lock = threading.Lock()
+
+
+def traces_sampler(sampling_context: dict) -> float:
+    name = sampling_context.get("transaction_context", {}).get("name")
+    if name in UNTRACED_TRANSACTIONS:
+        return 0.0
+    return TRACES_SAMPLE_RATE
+
+
+def init_telemetry(**options) -> None:
+    """
+    Initializes Sentry once per process, later calls do nothing.
+    :param options: overrides of sentry_sdk.init arguments (e.g. transport)
+    """
+    global _initialized
+    if _initialized:
+        return
+
+    # sentry_sdk is imported here to keep it out of the cold start of functions that don't use it
+    import sentry_sdk
+    from sentry_sdk.integrations.logging import LoggingIntegration
+
+    with _lock:
+        if _initialized:
+            return
+
+        sentry_logging = LoggingIntegration(
+            level=logging.getLevelName(BREADCRUMB_LEVEL),
+            event_level=logging.getLevelName(EVENT_LEVEL),
+        )
+        sentry_sdk.init(**{
+            'dsn': SENTRY_DSN,
+            'integrations': [sentry_logging],
+            'debug': SENTRY_DEBUG,
+            'attach_stacktrace': True,
+            'traces_sampler': traces_sampler,
+            **options,
+        })
+        _initialized = True
+
+
+def transaction(name: str):
+    """
+    Context manager tracing the request as a Sentry transaction, if it's sampled.
+    """
+    import sentry_sdk
+    return sentry_sdk.start_transaction(op="function", name=name)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, Optional
+
+# record stage durations of every request for logs (a line per request at INFO) and healthcheck percentiles,
+# off by default not to flood production logs; timings requested with timings=on are recorded regardless
+TIMINGS_ENABLED = os.getenv("FORMATTER_TIMINGS", "off") == "on"
+# number of last requests the percentiles are computed over
+TIMINGS_WINDOW = int(os.getenv("FORMATTER_TIMINGS_WINDOW", 1000))
+
+logger = logging.getLogger("Timings")
+logger.setLevel(logging.INFO)
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("timings", default=None)
+_disabled = nullcontext()
+
+
+class RequestTimings:
+    """
+    Durations of request stages in milliseconds (repeated stages are summed up) and sizes of the input.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.info: Dict[str, int] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1e3
+
+    def total(self) -> float:
+        return (time.perf_counter() - self.start) * 1e3
+
+    def as_dict(self) -> dict:
+        return {
+            'total_ms': round(self.total(), 3),
+            'stages_ms': {name: round(value, 3) for name, value in self.stages.items()},
+            **self.info,
+        }
+
+
+class StageStatistics:
+    """
+    Rolling percentiles of stage durations over the last `window` requests.
+    """
+
+    def __init__(self, window: int = TIMINGS_WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.durations: Dict[str, deque] = {}
+
+    def add(self, timings: RequestTimings) -> None:
+        with self.lock:
+            for name, value in (*timings.stages.items(), ('total', timings.total())):
+                if name not in self.durations:
+                    self.durations[name] = deque(maxlen=self.window)
+                self.durations[name].append(value)
+
+    @staticmethod
+    def __percentile(values: list, q: float) -> float:
+        return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+    def percentiles(self) -> dict:
+        with self.lock:
+            durations = {name: sorted(values) for name, values in self.durations.items()}
+        return {
+            name: {
+                'count': len(values),
+                'p50_ms': self.__percentile(values, 0.5),
+                'p90_ms': self.__percentile(values, 0.9),
+                'p99_ms': self.__percentile(values, 0.99),
+            }
+            for name, values in durations.items()
+        }
+
+
+stage_statistics = StageStatistics()
+
+
+def span(name: str):
+    """
+    Context manager measuring the stage of the current request, does nothing if timings are not recorded.
+    """
+    timings = _current.get()
+    if timings is None:
+        return _disabled
+    return timings.span(name)
+
+
+def recording() -> bool:
+    """
+    :return: whether timings of the current request are recorded, to skip computing values for record
+    """
+    return _current.get() is not None
+
+
+def record(name: str, value: int) -> None:
+    """
+    Adds input size or count to timings of the current request.
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.info[name] = value
+
+
+@contextmanager
+def request_timings(enabled: bool = TIMINGS_ENABLED) -> Iterator[Optional[RequestTimings]]:
+    """
+    Records timings of stages run inside, logs them and adds them to stage_statistics at the end.
+    :return: timings of the request, None if disabled
+    """
+    if not enabled:
+        yield None
+        return
+
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        stage_statistics.add(timings)
+        result = timings.as_dict()
+        # timings of requests asking for them are returned in the answer, logged only when debugging
+        level = logging.INFO if TIMINGS_ENABLED else logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, f"Request timings: {json.dumps(result)}", extra={"40k_timings": result})
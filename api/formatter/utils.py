@@ -1,14 +1,16 @@
 import logging
-from typing import Optional
+from typing import Optional, Dict, TYPE_CHECKING
 
-from lxml.objectify import ObjectifiedElement
+if TYPE_CHECKING:
+    from lxml.objectify import ObjectifiedElement
+    from .model import Selection
 
 
 class FormatterException(Exception):
     pass
 
 
-def is_upgrade(_object: ObjectifiedElement) -> bool:
+def is_upgrade(_object: 'Selection') -> bool:
     """
     Because 'type'=='upgrade' not always mean that it's upgrade
     https://github.com/bsdata/wh40k/issues/11182
@@ -20,21 +22,20 @@ def is_upgrade(_object: ObjectifiedElement) -> bool:
     # 10th edition, empty yet
     damn_dirty_hacks = []
 
-    if _object.get('type', None) == 'model':
+    if _object.type == 'model':
         return False
-    if _object.get('type', None) == 'unit':
+    if _object.type == 'unit':
         return False
 
-    if hasattr(_object, 'profiles'):
-        for profile in _object.profiles.getchildren():
-            if profile.get('typeName', None) == 'Unit':
-                logging.info(
-                    f"{_object.get('name', 'Unknown object')} is model/unit despite being marked as upgrade",
-                )
-                return False
+    for profile in _object.profiles or []:
+        if profile.type_name == 'Unit':
+            logging.info(
+                f"{_object.raw_name} is model/unit despite being marked as upgrade",
+            )
+            return False
 
     for hack in damn_dirty_hacks:
-        if _object.get('name', '').startswith(hack):
+        if _object.raw_name.startswith(hack):
             logging.warning("Still using dirty hack for is_upgrade", extra={'40k_object': _object})
             return False
 
@@ -46,3 +47,17 @@ def try_parse_int(_obj) -> Optional[int]:
         return int(_obj)
     except Exception:
         return None
+
+
+def category_index(_object: 'ObjectifiedElement') -> Dict[str, bool]:
+    """
+    Builds category name -> primary flag mapping of the selection.
+    Category is considered primary if any of its entries is marked as primary.
+    """
+    index = {}
+    for categories in _object.iterchildren('{*}categories'):
+        for category in categories.iterchildren():
+            name = category.get("name", "")
+            index[name] = index.get(name, False) or category.get("primary", "") == "true"
+        break  # only the first <categories> as objectify's `_object.categories` does
+    return index
@@ -1,33 +1,27 @@
-import os
-
 import azure.functions
 import logging
 import json
 
-import sentry_sdk
-from sentry_sdk.integrations.logging import LoggingIntegration
-
-
-sentry_logging = LoggingIntegration(
-    level=logging.INFO,        # Capture info and above as breadcrumbs
-    event_level=logging.WARNING  # Send errors as events
-)
+from ..formatter.cache import result_cache
+from ..formatter.names import name_cache_stats
+from ..formatter.timings import stage_statistics
 
-sentry_sdk.init(
-    dsn=os.getenv("SENTRY_DSN"),
-    integrations=[sentry_logging],
-    debug=True,
-    attach_stacktrace=True,
+# healthcheck imports only light modules of the formatter and doesn't initialize Sentry
+logging.basicConfig()
 
-    traces_sample_rate=1.0
-)
 
-logging.basicConfig()
+def status() -> dict:
+    return {
+        'info': 'ok',
+        'cache': result_cache.stats(),
+        'names': name_cache_stats(),
+        'timings': stage_statistics.percentiles(),
+    }
 
 
 def main(req: azure.functions.HttpRequest) -> azure.functions.HttpResponse:
     try:
-        answer = {'info': 'ok'}
+        answer = status()
         return azure.functions.HttpResponse(json.dumps(answer), status_code=200, mimetype='application/json')
 
     except Exception as e:
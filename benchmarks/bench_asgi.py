@@ -0,0 +1,127 @@
+"""
+In-process load test of the ASGI app (api/asgi.py): concurrent clients upload a roster in chunks and wait
+for the answer, while a probe measures healthcheck latency to show the event loop isn't blocked by parsing.
+Reports throughput, latency percentiles and the number of requests rejected by backpressure (503).
+No server or network is involved, run `python -m api.asgi` and a load generator of choice for an end-to-end test.
+Usage: python benchmarks/bench_asgi.py [--clients 16] [--requests 200] [--units 20] [--threads 4] [--max-pending 8]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from api.asgi import FormatterApp  # noqa: E402
+
+CHUNK_SIZE = 16 * 1024
+
+
+def multipart(fields: dict, roster: bytes) -> (bytes, bytes):
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="roster"; filename="roster.rosz"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'.encode() + roster + b"\r\n"
+    )
+    return b"".join(parts) + f"--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}".encode()
+
+
+async def call(app: FormatterApp, method: str, path: str, body: bytes = b"", content_type: bytes = b"") -> (int, dict):
+    chunks = [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)] or [b""]
+    messages = [{'type': 'http.request', 'body': x, 'more_body': i < len(chunks) - 1} for i, x in enumerate(chunks)]
+    response = {}
+
+    async def receive() -> dict:
+        if messages:
+            await asyncio.sleep(0)  # chunks arrive over time
+            return messages.pop(0)
+        return {'type': 'http.disconnect'}
+
+    async def send(message: dict) -> None:
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        else:
+            response['body'] = message['body']
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode())],
+    }
+    await app(scope, receive, send)
+    return response['status'], json.loads(response['body'])
+
+
+async def run(args) -> None:
+    app = FormatterApp(threads=args.threads, max_pending=args.max_pending)
+    rosters = [
+        multipart({'formats': 'wtc', 'show_secondaries': 'on'}, generate_roster(
+            GeneratorConfig(units_per_force=args.units, seed=i), zipped=True,
+        ))
+        for i in range(args.distinct)
+    ]
+    latencies = []
+    statuses = {}
+    probes = []
+    done = asyncio.Event()
+
+    async def client(index: int) -> None:
+        for i in range(index, args.requests, args.clients):
+            body, content_type = rosters[i % len(rosters)]
+            start = time.perf_counter()
+            code, _ = await call(app, 'POST', '/api/formatter', body, content_type)
+            statuses[code] = statuses.get(code, 0) + 1
+            if code == 200:
+                latencies.append(time.perf_counter() - start)
+            elif code == 503:
+                await asyncio.sleep(0.01)
+
+    async def probe() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await call(app, 'GET', '/api/healthcheck')
+            probes.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(client(x) for x in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    def percentile(values, q):
+        return statistics.quantiles(values, n=100)[q - 1] * 1e3 if len(values) > 1 else float('nan')
+
+    print(f"{args.requests} requests, {args.clients} clients, {args.threads} threads, max pending {args.max_pending}")
+    print(f"statuses {dict(sorted(statuses.items()))}, {statuses.get(200, 0) / elapsed:.1f} answers/s")
+    print(f"latency p50 {percentile(latencies, 50):.1f} ms, p99 {percentile(latencies, 99):.1f} ms")
+    print(f"healthcheck during load: p50 {percentile(probes, 50):.2f} ms, max {max(probes) * 1e3:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--units", type=int, default=20, help="units in every roster")
+    parser.add_argument("--distinct", type=int, default=50, help="number of distinct rosters, the rest hit the cache")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Microbenchmark of ForceView construction (selection dispatch and unit parsing) and secondaries counting
+on a 2000 points roster with many small units.
+Usage: python benchmarks/bench_dispatch.py [--units 40] [--categories 10] [--depth 1] [--repeat 200]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api"))
+
+from lxml import objectify  # noqa: E402
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from formatter.rosterview import RosterView  # noqa: E402
+from formatter.forceview import ForceView  # noqa: E402
+from formatter.extensions import FormatterOptions, count_secondaries  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=40)
+    parser.add_argument("--categories", type=int, default=10, help="categories per selection")
+    parser.add_argument("--depth", type=int, default=1, help="nesting depth of selections")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    config = GeneratorConfig(
+        units_per_force=args.units, categories_per_selection=args.categories, models_per_unit=3, nesting_depth=args.depth,
+    )
+    content = generate_roster(config)
+    tree = objectify.fromstring(content)
+    force = next(tree.forces.iterchildren(tag="{*}force"))
+    options = FormatterOptions()
+    roster = RosterView(content.decode('utf-8'), zipped=False)
+
+    force_view = timeit.timeit(lambda: ForceView(force, options), number=args.repeat) / args.repeat
+    secondaries = timeit.timeit(lambda: count_secondaries(roster), number=args.repeat) / args.repeat
+    print(f"ForceView construction: {force_view * 1e3:.3f} ms")
+    print(f"count_secondaries:      {secondaries * 1e3:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Per-unit cost of ForceView parsing on deep units: large squads with several wargear options per model
+and deeply nested upgrades. Selections, points and models of every unit are collected while parsing,
+so the time per unit is reported with and without counting models.
+Usage: python benchmarks/bench_forceview.py [--units 60] [--models 10] [--wargear 6] [--depth 5] [--repeat 10]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api"))
+
+from lxml import objectify  # noqa: E402
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from formatter.forceview import ForceView  # noqa: E402
+from formatter.extensions import FormatterOptions  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=60, help="units in the force")
+    parser.add_argument("--models", type=int, default=10, help="models per multi-model unit")
+    parser.add_argument("--wargear", type=int, default=6, help="wargear options per model")
+    parser.add_argument("--depth", type=int, default=5, help="nesting depth of selections")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    root = objectify.fromstring(generate_roster(GeneratorConfig(
+        units_per_force=args.units, models_per_unit=args.models, wargear_per_model=args.wargear,
+        nesting_depth=args.depth,
+    )))
+    force = next(root.forces.iterchildren())
+    options = FormatterOptions()
+    units = sum(len(x) for _, x in ForceView(force, options).enumerated_unit_categories.values())
+    print(f"{units} units, {sum(1 for _ in force.iter(tag='{*}selection'))} selections")
+
+    for count_models in (False, True):
+        best = min(timeit.repeat(lambda: ForceView(force, options, count_models), number=1, repeat=args.repeat))
+        print(f"count_models={count_models!s:>5}: {best * 1e3:8.2f} ms, {best / units * 1e6:7.1f} us/unit")
+
+
+if __name__ == '__main__':
+    main()
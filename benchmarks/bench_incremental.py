@@ -0,0 +1,88 @@
+"""
+Incremental re-formatting (see formatter.incremental): a roster is formatted with unit digests, a few of its
+units are edited, and the edited roster is formatted from scratch and with the units of the first version.
+Also measures what computing the digests adds to a full parse, which every indexed roster pays.
+Fails if the incremental output differs from the full one.
+Usage: python benchmarks/bench_incremental.py [--forces 8] [--units 100] [--edited 1 2 10] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import logging
+import os
+import sys
+import timeit
+
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api"))
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from formatter.rosterview import RosterView  # noqa: E402
+from formatter.extensions import FormatterOptions, UNIT_DIGESTS  # noqa: E402
+from formatter.formats import get_printer, required_data  # noqa: E402
+
+FORMATS = ['wtc', 'default']
+
+
+def edit_units(content: bytes, edited: int) -> bytes:
+    """
+    :return: roster with the number of the first nested selection changed in every n-th unit
+    """
+    root = etree.fromstring(content)
+    units = [
+        x for force in root.iter("{*}force") for selections in force.iterchildren("{*}selections")
+        for x in selections.iterchildren()
+        if x.get("type") in ("unit", "model") and x.find("{*}selections") is not None
+    ]
+    for unit in units[::max(len(units) // edited, 1)][:edited]:
+        child = unit.find("{*}selections")[0]
+        child.set("number", str(int(child.get("number", 1)) + 1))
+    return etree.tostring(root, xml_declaration=True, encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--forces", type=int, default=8)
+    parser.add_argument("--units", type=int, default=100, help="units per force")
+    parser.add_argument("--edited", type=int, nargs="+", default=[1, 2, 10], help="units edited in the new version")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    options = {'show_secondaries': 'on', 'show_model_count': 'on'}
+    content = generate_roster(GeneratorConfig(forces=args.forces, units_per_force=args.units), zipped=False)
+    data = required_data(FORMATS, FormatterOptions(**options))
+    printers = [get_printer(x) for x in FORMATS]
+
+    def format_roster(roster_content: bytes, indexed: bool, previous=None) -> (RosterView, list):
+        roster = RosterView.from_upload(
+            "roster.ros", io.BytesIO(roster_content), options,
+            required_data=data | {UNIT_DIGESTS} if indexed else data, previous_units=previous,
+        )
+        return roster, [x.print(roster) for x in printers] + [roster.secondaries]
+
+    def measure(function) -> float:
+        return min(timeit.repeat(function, number=1, repeat=args.repeat)) * 1e3
+
+    plain = measure(lambda: format_roster(content, False))
+    indexed = measure(lambda: format_roster(content, True))
+    print(f"{args.forces} forces x {args.units} units, {', '.join(FORMATS)} with secondaries")
+    print(f"full: {plain:7.1f} ms, with digests {indexed:7.1f} ms ({indexed / plain - 1:+.0%})")
+
+    first, _ = format_roster(content, True)  # renders the units of the first version once
+    for edited in args.edited:
+        new_content = edit_units(content, edited)
+        _, expected = format_roster(new_content, False)
+        incremental_roster, output = format_roster(new_content, True, first.unit_index)
+        if output != expected:
+            raise SystemExit(f"{edited} edited units: incremental output differs from the full one")
+        full = measure(lambda: format_roster(new_content, False))
+        incremental = measure(lambda: format_roster(new_content, True, first.unit_index))
+        print(f"{edited:>3} edited units: full {full:7.1f} ms, incremental {incremental:7.1f} ms "
+              f"({full / incremental:4.2f}x), {incremental_roster.reused_units} units reused")
+
+
+if __name__ == '__main__':
+    main()
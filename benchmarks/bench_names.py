@@ -0,0 +1,67 @@
+"""
+Selection name normalization: the "<n>x " prefix regex compiled on every call (the old ForceView code) against
+the precompiled and memoized normalize_name, on the names of all selections of a generated roster,
+plus ForceView parsing time and the name cache statistics after it.
+Usage: python benchmarks/bench_names.py [--forces 4] [--units 60] [--depth 3] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api"))
+
+from lxml import objectify  # noqa: E402
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from formatter.forceview import ForceView  # noqa: E402
+from formatter.extensions import FormatterOptions  # noqa: E402
+from formatter.names import normalize_name, name_cache_stats  # noqa: E402
+
+
+def compiled_per_call(name: str, number: int) -> (str, int):
+    pattern = re.compile(r"(?P<multiplier>\d+)x (?P<unitname>.*)")
+    if match := pattern.match(name):
+        number *= int(match.group('multiplier'))
+        name = match.group('unitname')
+    return name, number
+
+
+def memoized(name: str, number: int) -> (str, int):
+    _, name, multiplier = normalize_name(name)
+    return name, number * multiplier
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--forces", type=int, default=4)
+    parser.add_argument("--units", type=int, default=60, help="units per force")
+    parser.add_argument("--depth", type=int, default=3, help="nesting depth of selections")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    content = generate_roster(GeneratorConfig(
+        forces=args.forces, units_per_force=args.units, nesting_depth=args.depth,
+    ))
+    root = objectify.fromstring(content)
+    names = [x.get("name") for x in root.iter(tag="{*}selection")]
+    print(f"{len(names)} selections, {len(set(names))} distinct names")
+
+    for function in (compiled_per_call, memoized):
+        best = min(timeit.repeat(lambda: [function(x, 1) for x in names], number=1, repeat=args.repeat))
+        print(f"{function.__name__:>18}: {best * 1e3:8.2f} ms, {best / len(names) * 1e9:6.0f} ns/name")
+
+    options = FormatterOptions()
+    forces = list(root.forces.iterchildren())
+    best = min(timeit.repeat(lambda: [ForceView(x, options) for x in forces], number=1, repeat=args.repeat))
+    print(f"{'ForceView':>18}: {best * 1e3:8.2f} ms")
+    print(f"name cache: {name_cache_stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Serial against parallel building of forces (see formatter.parallel.ForceBuilder) on multi-force rosters
+of growing size, to find where a process pool starts paying off on this host.
+The pool is warmed up before measuring, as it's shared by all requests of the process.
+Also compares rendering of the forces with the cost of pickling them, which a worker rendering them would add.
+Usage: python benchmarks/bench_parallel_forces.py [--forces 2 4 8] [--units 5 20 60] [--workers 2 4] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import logging
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api"))
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from formatter.rosterview import RosterView  # noqa: E402
+from formatter.parallel import force_pool  # noqa: E402
+from formatter.formats import get_printer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--forces", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--units", type=int, nargs="+", default=[5, 20, 60], help="units per force")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    print(f"{os.cpu_count()} CPUs")
+
+    printer = get_printer('default')
+    options = {'show_secondaries': 'on'}
+    for forces in args.forces:
+        for units in args.units:
+            content = generate_roster(GeneratorConfig(forces=forces, units_per_force=units), zipped=True)
+
+            def build(workers: int) -> RosterView:
+                return RosterView.from_upload("roster.rosz", io.BytesIO(content), options, force_workers=workers)
+
+            def measure(function) -> float:
+                return min(timeit.repeat(function, number=1, repeat=args.repeat)) * 1e3
+
+            serial = measure(lambda: build(0))
+            row = [f"{forces} forces x {units:>3} units: serial {serial:7.1f} ms"]
+            for workers in args.workers:
+                force_pool(workers).submit(int).result()  # start the worker processes
+                build(workers)
+                parallel = measure(lambda: build(workers))
+                row.append(f"{workers} workers {parallel:7.1f} ms ({serial / parallel:4.2f}x)")
+
+            roster = build(0)
+            render = measure(lambda: printer.print(roster))
+            pickling = measure(lambda: pickle.loads(pickle.dumps(roster.forces)))
+            row.append(f"render {render:5.1f} ms, pickle forces {pickling:5.1f} ms")
+            print(", ".join(row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares full objectify parsing with streaming iterparse parsing of big rosters.
+
+Each run mimics one request: "objectify" reads the upload into memory, extracts the archive into bytes and
+builds the whole tree (the old path), "streaming" hands the upload stream to RosterView, which decompresses
+and parses it chunk by chunk.
+Every measurement runs in a fresh interpreter, so peak RSS of one mode doesn't leak into the other.
+Usage: python benchmarks/bench_parse.py [--forces 4] [--units 60] [--repeat 3] [--zipped]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from roster_generator import GeneratorConfig, generate_roster
+
+API_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api")
+
+WORKER = """
+import io, json, resource, sys, time, logging
+sys.path.insert(0, {api_path!r})
+logging.disable(logging.CRITICAL)
+from formatter.rosterview import RosterView
+
+upload = open({path!r}, 'rb')
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {streaming}:
+    roster = RosterView(upload, zipped={zipped}, streaming=True)
+elif {zipped}:
+    roster = RosterView(io.BytesIO(upload.read()), zipped=True)
+else:
+    roster = RosterView(upload.read().decode('utf-8'), zipped=False)
+elapsed = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': elapsed, 'peak_rss_kb': after, 'parse_rss_kb': after - before}}))
+"""
+
+
+def run_mode(path: str, streaming: bool, zipped: bool) -> dict:
+    code = WORKER.format(api_path=API_PATH, path=path, streaming=streaming, zipped=zipped)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--forces", type=int, default=4)
+    parser.add_argument("--units", type=int, default=60, help="units per force")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--zipped", action="store_true", help="upload roster as .rosz")
+    args = parser.parse_args()
+
+    content = generate_roster(GeneratorConfig(forces=args.forces, units_per_force=args.units), zipped=args.zipped)
+    with tempfile.NamedTemporaryFile(suffix=".rosz" if args.zipped else ".ros", delete=False) as f:
+        f.write(content)
+        path = f.name
+
+    try:
+        print(f"upload size: {len(content) / 1024 / 1024:.1f} MiB")
+        for name, streaming in (("objectify", False), ("streaming", True)):
+            runs = [run_mode(path, streaming, args.zipped) for _ in range(args.repeat)]
+            best = min(runs, key=lambda x: x['seconds'])
+            print(
+                f"{name:>10}: parse {best['seconds'] * 1000:8.1f} ms, "
+                f"request RSS growth {best['parse_rss_kb'] / 1024:7.1f} MiB, "
+                f"peak RSS {best['peak_rss_kb'] / 1024:7.1f} MiB"
+            )
+    finally:
+        os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark of printers on a large multi-detachment roster: render time and peak memory allocated while rendering,
+and time to render all formats from a freshly parsed roster, as a multi-format request does.
+Usage: python benchmarks/bench_render.py [--forces 8] [--units 100] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api"))
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from formatter.rosterview import RosterView  # noqa: E402
+from formatter.formats import ALL_FORMATS, get_printer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--forces", type=int, default=8)
+    parser.add_argument("--units", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    content = generate_roster(GeneratorConfig(forces=args.forces, units_per_force=args.units))
+
+    def parse() -> RosterView:
+        return RosterView(
+            content.decode('utf-8'), zipped=False, options={'show_secondaries': 'on', 'show_model_count': 'on'},
+        )
+
+    roster = parse()
+
+    for print_format in ALL_FORMATS:
+        printer = get_printer(print_format)
+        best = min(
+            _timed(lambda: printer.print(roster)) for _ in range(args.repeat)
+        )
+
+        tracemalloc.start()
+        output = printer.print(roster)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{print_format:>8}: {best * 1e3:8.2f} ms, peak allocated {peak / 1024:8.1f} KiB, "
+              f"output {len(output) / 1024:.1f} KiB")
+
+    printers = [get_printer(x) for x in ALL_FORMATS]
+    rosters = [parse() for _ in range(args.repeat)]
+    best = min(_timed(lambda: [x.print(fresh) for x in printers]) for fresh in rosters)
+    print(f"{'all':>8}: {best * 1e3:8.2f} ms on a freshly parsed roster")
+
+
+def _timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Cost of secondaries on a large roster: parsing and printing with show_secondaries off, the same with secondaries
+counted anyway (as RosterView did before they became lazy) and with show_secondaries on.
+Usage: python benchmarks/bench_secondaries.py [--forces 6] [--units 80] [--categories 10] [--depth 3] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api"))
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from formatter.rosterview import RosterView  # noqa: E402
+from formatter.extensions import FormatterOptions, ALL_DATA  # noqa: E402
+from formatter.formats import get_printer, required_data  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--forces", type=int, default=6)
+    parser.add_argument("--units", type=int, default=80, help="units per force")
+    parser.add_argument("--categories", type=int, default=10, help="categories per selection")
+    parser.add_argument("--depth", type=int, default=3, help="nesting depth of selections")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    content = generate_roster(GeneratorConfig(
+        forces=args.forces, units_per_force=args.units, categories_per_selection=args.categories,
+        nesting_depth=args.depth,
+    )).decode('utf-8')
+    printer = get_printer('default')
+
+    def run(show_secondaries: str, eager: bool = False):
+        options = FormatterOptions(show_secondaries=show_secondaries)
+        roster = RosterView(
+            content, zipped=False, options=options,
+            required_data=ALL_DATA if eager else required_data(['default'], options),
+        )
+        if eager:
+            roster.secondaries
+        printer.print(roster)
+
+    cases = {
+        "show_secondaries=off": lambda: run('off'),
+        "off, counted anyway": lambda: run('off', eager=True),
+        "show_secondaries=on": lambda: run('on'),
+    }
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        print(f"{name:>22}: {best * 1e3:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Rendering of large squads with per-model wargear (Ork Boyz, Guard squads): every model is a separate selection,
+models share a few distinct loadouts. Render time should follow the number of distinct loadouts,
+not the number of models. The squad is printed as the only unit of a roster, output digests allow to check
+that a change keeps the output intact (compare them before and after the change).
+Usage: python benchmarks/bench_squads.py [--models 10 100 1000] [--loadouts 3] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import os
+import random
+import sys
+import timeit
+
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api"))
+
+from formatter.model import Selection, Unit  # noqa: E402
+from formatter.extensions import FormatterOptions  # noqa: E402
+from formatter.forceview import UNIT_CATEGORIES  # noqa: E402
+from formatter.formats import ALL_FORMATS, get_printer  # noqa: E402
+
+WARGEAR = ["Slugga", "Choppa", "Big shoota", "Rokkit launcha", "Stikkbomb", "Power klaw", "Kombi-weapon"]
+
+
+def selection(name: str, number: int = 1, type: str = 'upgrade', grouped: bool = True, children=()) -> Selection:
+    return Selection(
+        name=name, number=number, type=type, entry_group_id="group" if grouped else None, raw_name=name,
+        raw_number=number, categories={}, profiles=None, children=list(children),
+    )
+
+
+def loadout(rng: random.Random) -> Selection:
+    weapons = [
+        selection(rng.choice(WARGEAR), rng.choice([1, 1, 2]), grouped=rng.random() < 0.7, children=[
+            selection(rng.choice(WARGEAR)) for _ in range(rng.randint(0, 2))
+        ])
+        for _ in range(rng.randint(2, 4))
+    ]
+    # models of one squad have the same name, so loadouts only differ in wargear
+    return selection("Boy", type='model', grouped=False, children=weapons)
+
+
+def squad(models: int, loadouts: int, seed: int = 40000) -> Unit:
+    rng = random.Random(seed)
+    variants = [loadout(rng) for _ in range(loadouts)]
+    children = []
+    for _ in range(models):
+        # every model is parsed separately, so equal loadouts are different objects
+        variant = rng.choice(variants)
+        children.append(Selection(
+            name=variant.name, number=1, type=variant.type, entry_group_id=None, raw_name=variant.raw_name,
+            raw_number=1, categories={}, profiles=None, children=_copy(variant.children),
+        ))
+    return Unit(
+        name="Boyz", number=1, type='unit', entry_group_id=None, raw_name="Boyz", raw_number=1,
+        categories={"Infantry": True}, profiles=None, children=children, cost=models * 8,
+    )
+
+
+def _copy(selections):
+    return [
+        Selection(
+            name=x.name, number=x.number, type=x.type, entry_group_id=x.entry_group_id, raw_name=x.raw_name,
+            raw_number=x.raw_number, categories={}, profiles=None, children=_copy(x.children),
+        )
+        for x in selections
+    ]
+
+
+def roster_of(unit: Unit, options: FormatterOptions) -> SimpleNamespace:
+    """
+    :return: stand-in for a RosterView with one force holding the unit, with what printers read
+    """
+    categories = {name: (short_name, [unit] if name == "Infantry" else []) for name, short_name in UNIT_CATEGORIES}
+    force = SimpleNamespace(
+        options=options, detachment="Waaagh! Tribe", detachment_choice="Detachment", catalogue="Orks", pts=unit.cost,
+        enumerated_unit_categories=categories, sorted_units={name: units for name, (_, units) in categories.items()},
+    )
+    return SimpleNamespace(name="Squads", factions={"Orks"}, pts_total=unit.cost, options=options, forces=[force])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--loadouts", type=int, default=3, help="distinct loadouts in the squad")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    for hide in ('off', 'on'):
+        options = FormatterOptions(hide_basic_selections=hide, show_model_count='on')
+        for models in args.models:
+            roster = roster_of(squad(models, args.loadouts), options)
+            row = []
+            for print_format in ALL_FORMATS:
+                printer = get_printer(print_format)
+
+                def render() -> str:
+                    return printer.print(roster)
+
+                best = min(timeit.repeat(render, number=1, repeat=args.repeat))
+                digest = hashlib.sha256(render().encode('utf-8')).hexdigest()[:8]
+                row.append(f"{print_format} {best * 1e3:7.3f} ms [{digest}]")
+            print(f"hide_basic={hide:>3}, {models:>5} models: {', '.join(row)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Cold start of the Azure functions: time to import the function module and time to its first response,
+each measured in a fresh interpreter, plus the heaviest imports reported by `python -X importtime`.
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--top 8] [--units 20]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from roster_generator import GeneratorConfig, generate_roster
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+FUNCTIONS = ("healthcheck", "formatter", "batch")
+
+WORKER = """
+import time
+start = time.perf_counter()
+import importlib, io, json, logging, sys, uuid
+sys.path.insert(0, {root!r})
+function = importlib.import_module("api.{function}")
+imported = time.perf_counter()
+
+import azure.functions
+logging.disable(logging.CRITICAL)
+boundary = uuid.uuid4().hex
+body = (
+    f"--{{boundary}}\\r\\nContent-Disposition: form-data; name=\\"roster\\"; filename=\\"roster.rosz\\"\\r\\n"
+    f"Content-Type: application/octet-stream\\r\\n\\r\\n"
+).encode() + open({path!r}, "rb").read() + f"\\r\\n--{{boundary}}--\\r\\n".encode()
+request = azure.functions.HttpRequest(
+    "POST", "/api/{function}", headers={{"Content-Type": f"multipart/form-data; boundary={{boundary}}"}}, body=body,
+)
+response = function.main(request)
+assert response.status_code == 200, response.get_body()
+responded = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - start) * 1e3, "first_response_ms": (responded - start) * 1e3}}))
+"""
+
+
+def run_worker(function: str, path: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    code = WORKER.format(root=ROOT, function=function, path=path)
+    arguments = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", code]
+    return subprocess.run(arguments, check=True, capture_output=True, text=True)
+
+
+def heaviest_imports(stderr: str, top: int) -> list:
+    """
+    :return: [(cumulative ms, package)] of top-level imports, from `python -X importtime` output
+    """
+    result = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, package = line.split("|")
+        if package.startswith("  ") or not cumulative.strip().isdigit():
+            continue  # nested import, counted in its parent, or the header
+        result.append((int(cumulative) / 1e3, package.strip()))
+    return sorted(result, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="number of heaviest imports to show")
+    parser.add_argument("--units", type=int, default=20, help="units in the roster of the first request")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".rosz", delete=False) as f:
+        f.write(generate_roster(GeneratorConfig(units_per_force=args.units), zipped=True))
+
+    try:
+        for function in FUNCTIONS:
+            runs = [json.loads(run_worker(function, f.name).stdout.strip().splitlines()[-1]) for _ in range(args.repeat)]
+            import_ms = statistics.median(x['import_ms'] for x in runs)
+            response_ms = statistics.median(x['first_response_ms'] for x in runs)
+            print(f"{function}: import {import_ms:.1f} ms, first response {response_ms:.1f} ms (median)")
+
+            for cumulative, package in heaviest_imports(run_worker(function, f.name, importtime=True).stderr, args.top):
+                print(f"    {cumulative:8.1f} ms  {package}")
+    finally:
+        os.remove(f.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-request overhead of Sentry telemetry at different sampling settings.
+
+Every setting runs in a fresh interpreter: Sentry is initialized with a stub transport that only counts
+envelopes, so nothing is sent over the network, and a batch of formatter requests (parse + print) is timed,
+each inside a "formatter" transaction like in the Azure function.
+Usage: python benchmarks/bench_telemetry.py [--units 20] [--requests 200]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from roster_generator import GeneratorConfig, generate_roster
+
+API_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api")
+
+# name -> (environment, whether Sentry is initialized)
+SETTINGS = {
+    "no sentry": ({}, False),
+    "traces 0.0": ({"SENTRY_TRACES_SAMPLE_RATE": "0.0"}, True),
+    "traces 0.1": ({"SENTRY_TRACES_SAMPLE_RATE": "0.1"}, True),
+    "traces 1.0": ({"SENTRY_TRACES_SAMPLE_RATE": "1.0"}, True),
+    "old defaults": (
+        {"SENTRY_TRACES_SAMPLE_RATE": "1.0", "SENTRY_DEBUG": "on", "SENTRY_BREADCRUMB_LEVEL": "INFO"}, True,
+    ),
+}
+
+WORKER = """
+import io, json, logging, sys, time
+sys.path.insert(0, {api_path!r})
+logging.basicConfig(handlers=[logging.NullHandler()])  # log records are still created for breadcrumbs
+from sentry_sdk.transport import Transport
+from formatter import telemetry
+from formatter.rosterview import RosterView
+from formatter.formats import get_printer
+
+class StubTransport(Transport):
+    envelopes = 0
+
+    def capture_envelope(self, envelope):
+        StubTransport.envelopes += 1
+
+if {initialize}:
+    telemetry.init_telemetry(dsn="https://public@stub.invalid/1", transport=StubTransport())
+
+content = open({path!r}, 'rb').read()
+printer = get_printer('default')
+start = time.perf_counter()
+for _ in range({requests}):
+    with telemetry.transaction("formatter"):
+        printer.print(RosterView.from_upload("roster.rosz", io.BytesIO(content)))
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms_per_request': elapsed / {requests} * 1e3, 'envelopes': StubTransport.envelopes}}))
+"""
+
+
+def run_setting(path: str, environment: dict, initialize: bool, requests: int) -> dict:
+    code = WORKER.format(api_path=API_PATH, path=path, initialize=initialize, requests=requests)
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True, env={**os.environ, **environment},
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=20, help="units in the roster")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    content = generate_roster(GeneratorConfig(units_per_force=args.units), zipped=True)
+    with tempfile.NamedTemporaryFile(suffix=".rosz", delete=False) as f:
+        f.write(content)
+
+    try:
+        baseline = None
+        for name, (environment, initialize) in SETTINGS.items():
+            result = run_setting(f.name, environment, initialize, args.requests)
+            if baseline is None:
+                baseline = result['ms_per_request']
+            overhead = result['ms_per_request'] - baseline
+            print(f"{name:>14}: {result['ms_per_request']:7.3f} ms/request ({overhead:+.3f} ms), "
+                  f"{result['envelopes']} envelopes")
+    finally:
+        os.remove(f.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compiled format definitions (formats/definitions): the time to load every definition, to compile it for
+an option set on first use, and to render a large multi-detachment roster with it. Outputs are checked against
+the ones the original printers produced by the tests (see tests/test_formats.py), render times against the printers
+by run_benchmarks.py --compare-revision (see its docstring).
+Usage: python benchmarks/bench_templates.py [--forces 8] [--units 100] [--repeat 7]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "api"))
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from formatter.rosterview import RosterView  # noqa: E402
+from formatter.extensions import FormatterOptions  # noqa: E402
+from formatter.formats import TEMPLATES  # noqa: E402
+from formatter.formats.template import TemplatePrinter  # noqa: E402
+
+OPTION_SETS = {
+    'plain': {},
+    'all options': {
+        'show_secondaries': 'on', 'show_model_count': 'on', 'hide_basic_selections': 'on', 'remove_costs': 'on',
+    },
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--forces", type=int, default=8)
+    parser.add_argument("--units", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    start = time.perf_counter()
+    templates = {x: TemplatePrinter.load(x) for x in TEMPLATES}
+    print(f"loading {len(templates)} definitions: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    content = generate_roster(GeneratorConfig(forces=args.forces, units_per_force=args.units)).decode('utf-8')
+    for label, options in OPTION_SETS.items():
+        roster = RosterView(content, zipped=False, options=options)
+        print(f"{label}:")
+        for print_format, template in templates.items():
+            compile_time = _timed(lambda: template.required_data(FormatterOptions(**options)))
+            best = min(_timed(lambda: template.print(roster)) for _ in range(args.repeat))
+            print(f"{print_format:>10}: compiled in {compile_time * 1e3:6.2f} ms, rendered in {best * 1e3:7.2f} ms")
+
+
+def _timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""
+Synthetic BattleScribe roster generator.
+
+We can't ship real player rosters, so benchmarks run on generated ones.
+The generated XML follows the structure BattleScribe produces for 10th edition
+rosters (namespace, costs, cost limits, forces, configuration selections, nested
+unit/model/upgrade selections with categories, profiles and costs).
+Usage: python benchmarks/roster_generator.py big.rosz [--forces 4] [--units 60] [--depth 3] [--categories 5]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import zipfile
+
+from dataclasses import dataclass
+from xml.sax.saxutils import quoteattr
+
+NAMESPACE = "http://www.battlescribe.net/schema/rosterSchema"
+
+UNIT_CATEGORIES = [
+    "Epic Hero", "Character", "Battleline", "Infantry", "Swarm", "Mounted", "Beast",
+    "Monster", "Vehicle", "Drone", "Dedicated Transport", "Fortification", "Allied Units",
+]
+KEYWORDS = [
+    "Faction: Adeptus Astartes", "Imperium", "Grenades", "Smoke", "Fly", "Psyker",
+    "Walker", "Transport", "Titanic", "Towering", "Deep Strike", "Jump Pack",
+]
+WARGEAR = [
+    "Bolt pistol", "Bolt rifle", "Plasma pistol", "Power fist", "Chainsword", "Heavy bolter",
+    "Lascannon", "Multi-melta", "Storm shield", "Thunder hammer", "Close combat weapon",
+    "Hunter-killer missile", "Storm bolter", "Grav-gun", "Flamer", "2x MV1 Gun Drone",
+]
+MODEL_NAMES = ["Intercessor", "Sergeant", "Terminator", "Aggressor", "Scout", "Gunner", "Boy", "Guardsman"]
+UNIT_NAMES = [
+    "Intercessor Squad", "Terminator Squad", "Captain", "Librarian", "Redemptor Dreadnought",
+    "Land Raider", "Rhino", "Predator Destructor", "Hellblasters", "Assault Intercessors",
+    "Chaplain", "Gladiator Lancer", "Repulsor", "Outrider Squad", "Infernus Squad",
+]
+ABILITY_TEXT = (
+    "Each time a model in this unit makes an attack, re-roll a Hit roll of 1. "
+    "While this model is leading a unit, weapons equipped by models in that unit have the "
+    "[LETHAL HITS] ability. "
+) * 4
+
+
+@dataclass
+class GeneratorConfig:
+    forces: int = 1
+    units_per_force: int = 20
+    models_per_unit: int = 5
+    nesting_depth: int = 2
+    wargear_per_model: int = 3
+    categories_per_selection: int = 3
+    abilities_per_unit: int = 3
+    points_limit: int = 2000
+    seed: int = 40000
+
+
+class _Ids:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def __call__(self) -> str:
+        return "%04x-%04x-%04x-%04x" % tuple(self.rng.randrange(0x10000) for _ in range(4))
+
+
+def _attrs(**kwargs) -> str:
+    return ''.join(f" {key}={quoteattr(str(value))}" for key, value in kwargs.items() if value is not None)
+
+
+class RosterGenerator:
+    def __init__(self, config: GeneratorConfig = None):
+        self.config = config or GeneratorConfig()
+        self.rng = random.Random(self.config.seed)
+        self.new_id = _Ids(self.rng)
+        self.total_pts = 0
+
+    def _categories(self, primary: str = None) -> str:
+        names = self.rng.sample(KEYWORDS, min(self.config.categories_per_selection, len(KEYWORDS)))
+        if primary is not None:
+            names = [primary, *names]
+        body = ''.join(
+            f"<category{_attrs(id=self.new_id(), name=name, entryId=self.new_id(), primary=str(name == primary).lower())}/>"
+            for name in names
+        )
+        return f"<categories>{body}</categories>"
+
+    def _costs(self, pts: int) -> str:
+        return f'<costs><cost name="pts" typeId="51b2-306e-1021-d207" value="{pts}.0"/></costs>'
+
+    def _rules(self) -> str:
+        rules = ''.join(
+            f"<rule{_attrs(id=self.new_id(), name=f'Rule {i}', hidden='false')}>"
+            f"<description>{ABILITY_TEXT}</description></rule>"
+            for i in range(self.config.abilities_per_unit)
+        )
+        return f"<rules>{rules}</rules>"
+
+    def _unit_profile(self, name: str, wounds: int) -> str:
+        values = [("M", '6"'), ("T", "4"), ("SV", "3+"), ("W", str(wounds)), ("LD", "6+"), ("OC", "2")]
+        characteristics = ''.join(
+            f"<characteristic{_attrs(name=key, typeId=self.new_id())}>{value}</characteristic>"
+            for key, value in values
+        )
+        return (
+            f"<profile{_attrs(id=self.new_id(), name=name, hidden='false', typeId='c547-1836-d8a-ff4f', typeName='Unit')}>"
+            f"<characteristics>{characteristics}</characteristics></profile>"
+        )
+
+    def _ability_profiles(self) -> str:
+        return ''.join(
+            f"<profile{_attrs(id=self.new_id(), name=f'Ability {i}', hidden='false', typeId='9cc3-6d83-4dd3-9b64', typeName='Abilities')}>"
+            f"<characteristics><characteristic name=\"Description\" typeId=\"9b8f-694b-e5e-4573\">{ABILITY_TEXT}"
+            f"</characteristic></characteristics></profile>"
+            for i in range(self.config.abilities_per_unit)
+        )
+
+    def _weapon(self, depth: int, number: int = 1) -> str:
+        name = self.rng.choice(WARGEAR)
+        grouped = self.rng.random() < 0.5
+        pts = self.rng.choice([0, 0, 0, 5, 10])
+        # BattleScribe's roster total is the sum of the costs of all selections, wargear included
+        self.total_pts += pts
+        children = ""
+        if depth > 1 and self.rng.random() < 0.3:
+            children = f"<selections>{self._weapon(depth - 1, number)}</selections>"
+        return (
+            f"<selection{_attrs(id=self.new_id(), name=name, entryId=self.new_id(), number=number, type='upgrade', entryGroupId=self.new_id() if grouped else None)}>"
+            f"{self._rules() if self.rng.random() < 0.2 else ''}"
+            f"{children}"
+            f"{self._costs(pts)}"
+            f"<categories/>"
+            f"</selection>"
+        )
+
+    def _model(self, depth: int, number: int, wounds: int, category: str = None) -> str:
+        name = self.rng.choice(MODEL_NAMES)
+        weapons = ''.join(self._weapon(depth - 1, number) for _ in range(self.config.wargear_per_model))
+        return (
+            f"<selection{_attrs(id=self.new_id(), name=name, entryId=self.new_id(), number=number, type='model')}>"
+            f"<profiles>{self._unit_profile(name, wounds)}</profiles>"
+            f"<selections>{weapons}</selections>"
+            f"{self._costs(0)}"
+            f"{self._categories(category) if category else '<categories/>'}"
+            f"</selection>"
+        )
+
+    def _unit(self) -> str:
+        cfg = self.config
+        category = self.rng.choice(UNIT_CATEGORIES)
+        name = self.rng.choice(UNIT_NAMES)
+        pts = self.rng.randrange(40, 300, 5)
+        self.total_pts += pts
+        big = category in ("Monster", "Vehicle")
+        wounds = self.rng.choice([10, 12, 14, 16, 18, 22]) if big else self.rng.choice([1, 2, 3, 5])
+
+        kind = self.rng.random()
+        if kind < 0.35:
+            # single model unit, typical for characters and vehicles
+            weapons = ''.join(self._weapon(cfg.nesting_depth) for _ in range(cfg.wargear_per_model))
+            warlord = ""
+            if category in ("Character", "Epic Hero") and self.rng.random() < 0.3:
+                warlord = f"<selection{_attrs(id=self.new_id(), name='Warlord', entryId=self.new_id(), number=1, type='upgrade')}><costs/><categories/></selection>"
+            return (
+                f"<selection{_attrs(id=self.new_id(), name=name, entryId=self.new_id(), number=1, type='model')}>"
+                f"{self._rules()}"
+                f"<profiles>{self._unit_profile(name, wounds)}{self._ability_profiles()}</profiles>"
+                f"<selections>{weapons}{warlord}</selections>"
+                f"{self._costs(pts)}"
+                f"{self._categories(category)}"
+                f"</selection>"
+            )
+
+        models = []
+        remaining = cfg.models_per_unit
+        sergeant = self._model(cfg.nesting_depth, 1, wounds, "Character" if self.rng.random() < 0.1 else None)
+        models.append(sergeant)
+        remaining -= 1
+        while remaining > 0:
+            number = self.rng.randint(1, remaining)
+            models.append(self._model(cfg.nesting_depth, number, wounds))
+            remaining -= number
+        if self.rng.random() < 0.2:
+            models.append(self._weapon(1))
+        if kind > 0.9:
+            # unit that keeps its profile at the unit level
+            profiles = f"<profiles>{self._unit_profile(name, wounds)}{self._ability_profiles()}</profiles>"
+        else:
+            profiles = f"<profiles>{self._ability_profiles()}</profiles>"
+
+        return (
+            f"<selection{_attrs(id=self.new_id(), name=name, entryId=self.new_id(), number=1, type='unit')}>"
+            f"{self._rules()}"
+            f"{profiles}"
+            f"<selections>{''.join(models)}</selections>"
+            f"{self._costs(pts)}"
+            f"{self._categories(category)}"
+            f"</selection>"
+        )
+
+    def _configuration(self, name: str, child: str = None) -> str:
+        children = ""
+        if child:
+            children = (
+                f"<selections><selection{_attrs(id=self.new_id(), name=child, entryId=self.new_id(), number=1, type='upgrade')}>"
+                f"{self._rules()}<costs/><categories/></selection></selections>"
+            )
+        return (
+            f"<selection{_attrs(id=self.new_id(), name=name, entryId=self.new_id(), number=1, type='upgrade')}>"
+            f"{children}<costs/>{self._categories('Configuration')}</selection>"
+        )
+
+    def _force(self, index: int) -> str:
+        configuration = [
+            self._configuration("Battle Size", "Strike Force (2000 Point limit)"),
+            self._configuration("Detachment", f"Gladius Task Force {index}"),
+            self._configuration("Show/Hide Options"),
+        ]
+        units = [self._unit() for _ in range(self.config.units_per_force)]
+        return (
+            f"<force{_attrs(id=self.new_id(), name='Army Roster', entryId=self.new_id(), catalogueId=self.new_id(), catalogueRevision='1', catalogueName=f'Imperium - Space Marines {index}')}>"
+            f"{self._rules()}"
+            f"<selections>{''.join(configuration)}{''.join(units)}</selections>"
+            f"{self._categories()}"
+            f"</force>"
+        )
+
+    def generate(self) -> bytes:
+        self.total_pts = 0
+        forces = ''.join(self._force(i) for i in range(self.config.forces))
+        header = (
+            f"<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"yes\"?>"
+            f"<roster{_attrs(id=self.new_id(), name='Synthetic Roster', battleScribeVersion='2.03', gameSystemId='sys-352e-adc2-7639-d6a9', gameSystemName='Warhammer 40,000 10th Edition', gameSystemRevision='1', xmlns=NAMESPACE)}>"
+            f"{self._costs(self.total_pts)}"
+            f"<costLimits><costLimit name=\"pts\" typeId=\"51b2-306e-1021-d207\" value=\"{self.config.points_limit}.0\"/></costLimits>"
+        )
+        return (header + f"<forces>{forces}</forces></roster>").encode('utf-8')
+
+    def generate_zipped(self, member_name: str = "roster.ros") -> bytes:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(member_name, self.generate())
+        return buffer.getvalue()
+
+
+def generate_roster(config: GeneratorConfig = None, zipped: bool = False) -> bytes:
+    generator = RosterGenerator(config)
+    return generator.generate_zipped() if zipped else generator.generate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes a synthetic BattleScribe roster (.ros or .rosz by extension).")
+    parser.add_argument("output", help="path of the roster file, .rosz files are zipped")
+    parser.add_argument("--forces", type=int, default=GeneratorConfig.forces)
+    parser.add_argument("--units", type=int, default=GeneratorConfig.units_per_force, help="units per force")
+    parser.add_argument("--models", type=int, default=GeneratorConfig.models_per_unit, help="models per unit")
+    parser.add_argument("--depth", type=int, default=GeneratorConfig.nesting_depth, help="nesting depth of selections")
+    parser.add_argument("--wargear", type=int, default=GeneratorConfig.wargear_per_model, help="wargear per model")
+    parser.add_argument(
+        "--categories", type=int, default=GeneratorConfig.categories_per_selection, help="categories per selection",
+    )
+    parser.add_argument("--abilities", type=int, default=GeneratorConfig.abilities_per_unit, help="abilities per unit")
+    parser.add_argument("--seed", type=int, default=GeneratorConfig.seed)
+    args = parser.parse_args()
+
+    config = GeneratorConfig(
+        forces=args.forces,
+        units_per_force=args.units,
+        models_per_unit=args.models,
+        nesting_depth=args.depth,
+        wargear_per_model=args.wargear,
+        categories_per_selection=args.categories,
+        abilities_per_unit=args.abilities,
+        seed=args.seed,
+    )
+    content = generate_roster(config, zipped=args.output.endswith(".rosz"))
+    with open(args.output, "wb") as f:
+        f.write(content)
+    print(f"{args.output}: {len(content)} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Benchmark suite: times and memory-profiles every stage of formatting a synthetic roster separately
+(extraction, xml parsing, ForceView construction, count_secondaries and each printer) and writes results as JSON.
+
+Time is the best and the median of --repeat runs, memory is the peak allocated by Python objects during
+one run (tracemalloc), which is stable between runs unlike RSS. lxml trees are allocated by libxml2 and are
+not visible to tracemalloc, so peak RSS of the whole suite is reported as well.
+Compare two commits by running the suite on both and passing the first result with --compare,
+or let the suite run the one of another revision with --compare-revision, e.g. the last one with the hand-written
+printers the format definitions replaced (their stages run in a subprocess from the revision's tree):
+    python benchmarks/run_benchmarks.py --revision-env FORMATTER_TEMPLATES=off --compare-revision \
+        "$(git log -1 --format=%h --diff-filter=D -- api/formatter/formats/wtc_printer.py)^"
+Usage: python benchmarks/run_benchmarks.py [--forces 4] [--units 60] [--depth 2] [--categories 3] [--repeat 5]
+       [--output results.json] [--compare baseline.json | --compare-revision REV [--revision-env NAME=VALUE]]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+
+from dataclasses import asdict
+from typing import Callable, List, Mapping, Optional
+from zipfile import ZipFile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, os.path.join(ROOT, "api"))
+
+from lxml import objectify  # noqa: E402
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from formatter.rosterview import RosterView  # noqa: E402
+from formatter.forceview import ForceView  # noqa: E402
+from formatter.extensions import FormatterOptions, count_secondaries  # noqa: E402
+from formatter.formats import ALL_FORMATS, get_printer  # noqa: E402
+
+OPTIONS = {'hide_basic_selections': 'on', 'show_secondaries': 'on', 'show_model_count': 'on'}
+
+
+def measure(function: Callable[[], object], repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'best_ms': round(min(times) * 1e3, 3),
+        'median_ms': round(statistics.median(times) * 1e3, 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run_suite(config: GeneratorConfig, repeat: int) -> dict:
+    rosz = generate_roster(config, zipped=True)
+    xml = ZipFile(io.BytesIO(rosz)).read("roster.ros")
+    options = FormatterOptions(**OPTIONS)
+
+    tree = objectify.fromstring(xml)
+    forces = list(tree.forces.iterchildren(tag="{*}force"))
+    roster = RosterView(xml.decode('utf-8'), zipped=False, options=options)
+
+    stages = {
+        'extract': lambda: ZipFile(io.BytesIO(rosz)).read("roster.ros"),
+        'parse': lambda: objectify.fromstring(xml),
+        'forceview': lambda: [ForceView(x, options) for x in forces],
+        'secondaries': lambda: count_secondaries(roster),
+    }
+    for print_format in ALL_FORMATS:
+        stages[f'print:{print_format}'] = lambda printer=get_printer(print_format): printer.print(roster)
+    stages['total'] = lambda: get_printer('default').print(
+        RosterView.from_upload("roster.rosz", io.BytesIO(rosz), options=options)
+    )
+
+    return {
+        'input': {
+            'rosz_bytes': len(rosz),
+            'xml_bytes': len(xml),
+            'units': sum(len(x[1]) for force in roster.forces for x in force.enumerated_unit_categories.values()),
+        },
+        'stages': {name: measure(function, repeat) for name, function in stages.items()},
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_revision(revision: str, arguments: List[str], environment: Mapping[str, str]) -> dict:
+    """
+    Runs the suite of another revision on its own tree, extracted from git to a temporary directory.
+    :param arguments: arguments of the suite, the same roster config for both runs
+    :return: results of the revision
+    """
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", revision, "api", "benchmarks"], cwd=ROOT, check=True, capture_output=True,
+    ).stdout
+    with tempfile.TemporaryDirectory() as directory:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(directory)
+        output = os.path.join(directory, "results.json")
+        subprocess.run(
+            [sys.executable, os.path.join(directory, "benchmarks", "run_benchmarks.py"), *arguments, "--output", output],
+            env={**os.environ, **environment}, check=True, stdout=subprocess.DEVNULL,
+        )
+        with open(output) as f:
+            results = json.load(f)
+    # the extracted tree isn't a repository
+    results['revision'] = subprocess.run(
+        ["git", "rev-parse", "--short", revision], cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+    return results
+
+
+def print_results(results: dict, baseline: Optional[dict]) -> None:
+    header = f"{'stage':<14}{'best ms':>12}{'median ms':>12}{'peak KiB':>12}"
+    print(header + (f"{'vs base':>12}" if baseline else ""))
+    for name, values in results['stages'].items():
+        line = f"{name:<14}{values['best_ms']:>12.3f}{values['median_ms']:>12.3f}{values['peak_kib']:>12.1f}"
+        if baseline and name in baseline['stages'] and baseline['stages'][name]['best_ms']:
+            line += f"{values['best_ms'] / baseline['stages'][name]['best_ms']:>11.2f}x"
+        print(line)
+    print(f"peak RSS: {results['peak_rss_kib']} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--forces", type=int, default=4)
+    parser.add_argument("--units", type=int, default=60, help="units per force")
+    parser.add_argument("--depth", type=int, default=2, help="nesting depth of selections")
+    parser.add_argument("--categories", type=int, default=3, help="categories per selection")
+    parser.add_argument("--seed", type=int, default=GeneratorConfig.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results to this JSON file")
+    comparison = parser.add_mutually_exclusive_group()
+    comparison.add_argument("--compare", help="JSON results of a previous run to compare with")
+    comparison.add_argument("--compare-revision", metavar="REV", help="git revision to run the suite of and compare with")
+    parser.add_argument(
+        "--revision-env", action="append", default=[], metavar="NAME=VALUE",
+        help="environment variable of the --compare-revision run, can be repeated",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    config = GeneratorConfig(
+        forces=args.forces,
+        units_per_force=args.units,
+        nesting_depth=args.depth,
+        categories_per_selection=args.categories,
+        seed=args.seed,
+    )
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': asdict(config),
+        'repeat': args.repeat,
+        **run_suite(config, args.repeat),
+    }
+    results['peak_rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    elif args.compare_revision:
+        arguments = [
+            f"--forces={args.forces}", f"--units={args.units}", f"--depth={args.depth}",
+            f"--categories={args.categories}", f"--seed={args.seed}", f"--repeat={args.repeat}",
+        ]
+        environment = dict(x.split("=", 1) for x in args.revision_env)
+        baseline = run_revision(args.compare_revision, arguments, environment)
+        print(f"compared with {args.compare_revision} ({baseline['revision']})")
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
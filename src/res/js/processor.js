@@ -31,7 +31,7 @@ document.getElementById("roster").onchange = async (e) => {
 
         let result = await response.json();
         info = result.info;
-        debug_text = result.debug;
+        debug_text = result.debug || "";
     } catch (error) {
         info = await error.text();
         debug_text = "";
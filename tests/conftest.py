@@ -0,0 +1,68 @@
+"""
+Shared fixtures of the tests: rosters in tests/rosters, their expected outputs in tests/expected
+(written by make_fixtures.py) and helpers formatting them the way the API does.
+"""
+from __future__ import annotations
+
+import io
+import itertools
+import logging
+import os
+import sys
+
+from typing import Dict, List, Mapping, Tuple
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, os.pardir, "api"))
+
+from formatter.rosterview import RosterView  # noqa: E402
+from formatter.extensions import FormatterOptions  # noqa: E402
+from formatter.formats import ALL_FORMATS, get_printer, required_data  # noqa: E402
+
+ROSTERS_DIR = os.path.join(TESTS_DIR, "rosters")
+EXPECTED_DIR = os.path.join(TESTS_DIR, "expected")
+# every combination of the options that change the output, debug is added by the tests
+OPTION_NAMES = ('hide_basic_selections', 'show_secondaries', 'remove_costs', 'show_model_count')
+OPTION_SETS = [dict(zip(OPTION_NAMES, values)) for values in itertools.product(('on', 'off'), repeat=len(OPTION_NAMES))]
+
+logging.disable(logging.CRITICAL)
+
+
+def roster_names() -> List[str]:
+    return sorted(os.listdir(ROSTERS_DIR))
+
+
+def roster_path(name: str) -> str:
+    return os.path.join(ROSTERS_DIR, name)
+
+
+def options_key(options: Mapping[str, str]) -> str:
+    return ','.join(f"{x}={options[x]}" for x in OPTION_NAMES)
+
+
+def format_all(name: str, options: Mapping[str, str]) -> Tuple[Dict[str, str], str]:
+    """
+    Parses the roster for every format separately, with only the data that format needs, as single-format
+    requests do.
+    :return: output of every format, debug output
+    """
+    with open(roster_path(name), 'rb') as f:
+        return format_content(name, f.read(), options)
+
+
+def format_content(filename: str, content: bytes, options: Mapping[str, str]) -> Tuple[Dict[str, str], str]:
+    """
+    See format_all
+    """
+    formatter_options = FormatterOptions(**options)
+    info = {}
+    debug = set()
+    for print_format in ALL_FORMATS:
+        roster = RosterView.from_upload(
+            filename, io.BytesIO(content), options=formatter_options,
+            required_data=required_data([print_format], formatter_options),
+        )
+        info[print_format] = get_printer(print_format).print(roster)
+        debug.add(roster.debug_info)
+    assert len(debug) == 1, "debug output depends on the format"
+    return info, debug.pop()
@@ -0,0 +1,77 @@
+"""
+Writes the rosters the tests format (tests/rosters) and their expected outputs (tests/expected).
+Expected outputs are what the current tree prints, so regenerate them only for intended changes of the output
+and review the diff: python tests/make_fixtures.py [--outputs-only]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import logging
+import os
+import re
+import sys
+import zipfile
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, os.pardir, "benchmarks"))
+sys.path.insert(0, os.path.join(TESTS_DIR, os.pardir, "api"))
+
+from roster_generator import GeneratorConfig, generate_roster  # noqa: E402
+from conftest import ROSTERS_DIR, EXPECTED_DIR, OPTION_SETS, format_all, options_key, roster_names  # noqa: E402
+
+# name -> roster, .rosz names are zipped. Every force of a roster has the same catalogue:
+# factions are a set, so the order of several of them depends on PYTHONHASHSEED
+ROSTERS = {
+    'single_force.rosz': GeneratorConfig(seed=1, forces=1, units_per_force=8, nesting_depth=2, models_per_unit=3),
+    'two_forces.ros': GeneratorConfig(seed=2, forces=2, units_per_force=5, nesting_depth=3, models_per_unit=2),
+    'three_forces.rosz': GeneratorConfig(seed=3, forces=3, units_per_force=4, nesting_depth=1, models_per_unit=3),
+    'deep.rosz': GeneratorConfig(seed=4, forces=1, units_per_force=6, nesting_depth=4, models_per_unit=2),
+    'empty_force.rosz': GeneratorConfig(seed=5, forces=1, units_per_force=0),
+}
+
+
+def write_rosters() -> None:
+    os.makedirs(ROSTERS_DIR, exist_ok=True)
+    for name, config in ROSTERS.items():
+        config.abilities_per_unit = 1  # ability texts are never printed
+        content = generate_roster(config, zipped=False)
+        content = re.sub(rb'catalogueName="([^"]*?) \d+"', rb'catalogueName="\1"', content)
+        if name.endswith(".rosz"):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                # fixed timestamp, so regenerated archives only change with their content
+                archive.writestr(zipfile.ZipInfo(name[:-1], (2024, 1, 1, 0, 0, 0)), content, zipfile.ZIP_DEFLATED)
+            content = buffer.getvalue()
+        with open(os.path.join(ROSTERS_DIR, name), 'wb') as f:
+            f.write(content)
+
+
+def write_outputs() -> None:
+    os.makedirs(EXPECTED_DIR, exist_ok=True)
+    for name in roster_names():
+        expected = {'info': {}, 'debug': None}
+        for options in OPTION_SETS:
+            info, debug = format_all(name, {**options, 'debug': 'on'})
+            expected['info'][options_key(options)] = info
+            if expected['debug'] not in (None, debug):
+                raise SystemExit(f"{name}: debug output depends on the options, tests expect one per roster")
+            expected['debug'] = debug
+        with open(os.path.join(EXPECTED_DIR, f"{name}.json"), 'w', encoding='utf-8') as f:
+            json.dump(expected, f, indent=1, ensure_ascii=False, sort_keys=True)
+            f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--outputs-only", action="store_true", help="keep the rosters, only print them again")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    if not args.outputs_only:
+        write_rosters()
+    write_outputs()
+
+
+if __name__ == '__main__':
+    main()
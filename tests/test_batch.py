@@ -0,0 +1,57 @@
+"""
+Batch formatting (see formatter.batch): one broken file or archive member doesn't affect the others.
+"""
+import io
+import zipfile
+
+from conftest import format_all, roster_path
+
+from formatter import batch
+
+OPTIONS = {'formats': 'wtc'}
+
+
+def read(name: str) -> bytes:
+    with open(roster_path(name), 'rb') as f:
+        return f.read()
+
+
+def archive(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as f:
+        for name, content in members.items():
+            f.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_broken_files_are_reported(monkeypatch):
+    roster = read("two_forces.ros")
+    monkeypatch.setattr(batch, "MAX_ROSTER_SIZE", len(roster) - 1)
+    uploads = [
+        ("single.rosz", read("single_force.rosz")),
+        ("broken.zip", b"not a zip archive"),
+        ("event.zip", archive({"big.ros": roster, "deep.rosz": read("deep.rosz"), "broken.rosz": b"not a roster"})),
+    ]
+    answer = batch.format_batch(uploads, OPTIONS, workers=1)
+
+    assert set(answer['results']) == {"single.rosz", "deep.rosz"}
+    assert answer['results']["deep.rosz"]['info'] == format_all("deep.rosz", OPTIONS)[0]['wtc']
+    assert set(answer['errors']) == {"broken.zip", "big.ros", "broken.rosz"}
+    assert "not a valid zip archive" in answer['errors']["broken.zip"]
+    assert "too big" in answer['errors']["big.ros"]
+    assert (answer['stats']['files'], answer['stats']['failed']) == (5, 3)
+
+
+def test_duplicated_names():
+    roster = read("deep.rosz")
+    answer = batch.format_batch([("a.rosz", roster), ("a.rosz", roster), ("a.zip", b"")], OPTIONS, workers=1)
+    assert set(answer['results']) == {"a.rosz", "a.rosz (2)"}
+    assert set(answer['errors']) == {"a.zip"}
+
+
+def test_worker_processes():
+    uploads = [(name, read(name)) for name in ("single_force.rosz", "two_forces.ros", "three_forces.rosz")]
+    options = {**OPTIONS, 'debug': 'on'}
+    answer = batch.format_batch(uploads, options, workers=2)
+    assert answer['results'] == batch.format_batch(uploads, options, workers=1)['results']
+    assert not answer['errors'] and answer['stats']['workers'] == 2
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from conftest import OPTION_SETS, roster_path
+
+from formatter import pipeline
+from formatter.cache import CacheBackend, CacheError, FileSystemCache, MemoryCache, NullCache, ResultCache
+from formatter.rosterview import RosterView
+
+
+def test_incomplete_backend():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_entries_are_signed(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache = FileSystemCache(directory, max_size=4)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    cache.set("key", {'value': 1})
+    assert cache.get("key") == {'value': 1}
+    # a worker started later shares the generated secret
+    assert FileSystemCache(directory, max_size=4).get("key") == {'value': 1}
+    assert FileSystemCache(directory, max_size=4, secret="another").get("key") is None
+
+    path, = [x.path for x in os.scandir(directory) if x.name.endswith(".pickle")]
+    with open(path, 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"\0")
+    assert cache.get("key") is None
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason="permissions are checked on POSIX only")
+def test_shared_directory_is_refused(tmp_path):
+    directory = tmp_path / "cache"
+    directory.mkdir(mode=0o777)
+    directory.chmod(0o777)
+    with pytest.raises(CacheError):
+        FileSystemCache(str(directory))
+
+
+def test_memory_is_bounded_by_size():
+    cache = MemoryCache(max_size=10, max_bytes=100)
+    for key in "abc":
+        cache.set(key, key, 40)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, "b", "c")
+    assert cache.bytes == 80
+    cache.set("b", "b", 10)  # replaced, not counted twice
+    assert cache.bytes == 50
+    cache.set("huge", "huge", 101)
+    assert cache.get("huge") is None and len(cache) == 2
+
+
+def test_no_digest_without_cache(monkeypatch):
+    def content_digest(*args, **kwargs):
+        raise AssertionError("digest is computed without a cache")
+
+    with open(roster_path("two_forces.ros"), 'rb') as stream:
+        expected = pipeline.format_upload("two_forces.ros", stream, {**OPTION_SETS[0], 'formats': 'all'})
+    monkeypatch.setattr(pipeline, 'result_cache', ResultCache(NullCache()))
+    monkeypatch.setattr(RosterView, 'content_digest', content_digest)
+    with open(roster_path("two_forces.ros"), 'rb') as stream:
+        assert pipeline.format_upload("two_forces.ros", stream, {**OPTION_SETS[0], 'formats': 'all'}) == expected
+
+
+@pytest.mark.parametrize("backend", [NullCache, MemoryCache])
+def test_roster_is_parsed_once_for_all_formats(monkeypatch, backend):
+    cache = ResultCache(backend())
+    monkeypatch.setattr(pipeline, 'result_cache', cache)
+    parsed = []
+    from_upload = RosterView.from_upload
+
+    def counted(*args, **kwargs):
+        parsed.append(args[0])
+        return from_upload(*args, **kwargs)
+
+    monkeypatch.setattr(RosterView, 'from_upload', counted)
+    with open(roster_path("two_forces.ros"), 'rb') as stream:
+        pipeline.format_upload("two_forces.ros", stream, {**OPTION_SETS[0], 'formats': 'all'})
+    assert len(parsed) == 1
+    if cache.enabled:
+        assert cache.counters['roster'] == {'hits': 0, 'misses': 1}
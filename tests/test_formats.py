@@ -0,0 +1,66 @@
+"""
+Output of every format for the fixture rosters with every combination of the options, against the outputs
+the original printers produced (tests/expected, see make_fixtures.py).
+"""
+import json
+import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import EXPECTED_DIR, OPTION_SETS, format_all, options_key, roster_names, roster_path
+
+from formatter.pipeline import format_upload
+from formatter.rosterview import RosterView
+
+
+def expected_outputs(name: str) -> dict:
+    with open(os.path.join(EXPECTED_DIR, f"{name}.json"), encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("debug", ['off', 'on'])
+@pytest.mark.parametrize("options", OPTION_SETS, ids=options_key)
+@pytest.mark.parametrize("name", roster_names())
+def test_formats(name, options, debug):
+    expected = expected_outputs(name)
+    info, debug_info = format_all(name, {**options, 'debug': debug})
+    assert info == expected['info'][options_key(options)]
+    assert debug_info == (expected['debug'] if debug == 'on' else '')
+
+
+@pytest.mark.parametrize("debug", ['off', 'on'])
+@pytest.mark.parametrize("name", roster_names())
+def test_upload_all_formats(name, debug):
+    """
+    All formats from one upload, rendered from the same parsed roster, the second answer comes from the cache.
+    """
+    expected = expected_outputs(name)
+    for options in OPTION_SETS:
+        for _ in range(2):
+            with open(roster_path(name), 'rb') as stream:
+                answer = format_upload(name, stream, {**options, 'debug': debug, 'formats': 'all'})
+            assert answer['info'] == expected['info'][options_key(options)]
+            assert answer.get('debug', None) == (expected['debug'] if debug == 'on' else None)
+
+
+def test_shared_roster():
+    """
+    Rosters are shared by requests through the result cache: threads counting secondaries of the same roster
+    at once get the same debug output.
+    """
+    name = "three_forces.rosz"
+    threads = 8
+    barrier = threading.Barrier(threads)
+    with open(roster_path(name), 'rb') as stream:
+        roster = RosterView.from_upload(name, stream, {**OPTION_SETS[0], 'debug': 'on'})
+
+    def debug_info(_) -> str:
+        barrier.wait()
+        return roster.debug_info
+
+    with ThreadPoolExecutor(threads) as pool:
+        assert set(pool.map(debug_info, range(threads))) == {expected_outputs(name)['debug']}
+    assert roster.debug_info == expected_outputs(name)['debug']
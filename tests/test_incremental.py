@@ -0,0 +1,65 @@
+"""
+Formatting of an edited roster with the units of its previous version (see formatter.incremental)
+against formatting it from scratch.
+"""
+import io
+
+import pytest
+from lxml import etree
+
+from conftest import OPTION_SETS, format_content, roster_path
+
+from formatter.pipeline import format_upload
+
+ALL_OPTIONS = OPTION_SETS[0]  # everything on
+
+
+def edit(content: bytes) -> bytes:
+    """
+    :return: roster with one unit changed, one removed and a copy of another one added as a new unit
+    """
+    root = etree.fromstring(content)
+    selections = next(root.iter("{*}force")).find("{*}selections")
+    units = [x for x in selections if x.get("type") in ("unit", "model") and x.find("{*}selections") is not None]
+    child = units[0].find("{*}selections")[0]
+    child.set("number", str(int(child.get("number", 1)) + 1))
+    selections.remove(units[1])
+    added = etree.fromstring(etree.tostring(units[2]))
+    added.set("id", "added-unit")
+    added.set("name", "Added Unit")
+    selections.append(added)
+    return etree.tostring(root, xml_declaration=True, encoding="utf-8")
+
+
+def upload(content: bytes, options: dict) -> dict:
+    return format_upload("roster.ros", io.BytesIO(content), options)
+
+
+@pytest.mark.parametrize("debug", ['off', 'on'])
+def test_edited_roster(debug):
+    with open(roster_path("two_forces.ros"), 'rb') as f:
+        first = f.read()
+    second = edit(first)
+    options = {**ALL_OPTIONS, 'debug': debug, 'formats': 'all'}
+
+    first_answer = upload(first, {**options, 'incremental': 'on'})
+    assert first_answer['incremental']['found'] is False
+    answer = upload(second, {**options, 'previous': first_answer['id']})
+
+    info, debug_info = format_content("roster.ros", second, options)
+    assert answer['info'] == info
+    assert answer.get('debug', None) == (debug_info if debug == 'on' else None)
+    report = answer['incremental']
+    assert report['found'] is True
+    assert (report['changed'], report['added'], report['removed']) == (1, 1, 1)
+    assert report['parsed'] == 2
+    assert report['reused'] == report['unchanged']
+    assert answer['id'] != first_answer['id']
+
+
+def test_unknown_previous():
+    with open(roster_path("two_forces.ros"), 'rb') as f:
+        content = f.read()
+    answer = upload(content, {**ALL_OPTIONS, 'formats': 'wtc', 'previous': "unknown"})
+    assert answer['incremental']['found'] is False
+    assert answer['info'] == format_content("roster.ros", content, ALL_OPTIONS)[0]['wtc']
@@ -0,0 +1,45 @@
+"""
+Forces built in worker processes (see formatter.parallel) against the ones built in the request process.
+"""
+import pytest
+
+from conftest import OPTION_SETS, roster_names, roster_path
+
+from formatter import parallel
+from formatter.extensions import ALL_DATA, FormatterOptions, UNIT_DIGESTS
+from formatter.formats import ALL_FORMATS, get_printer
+from formatter.parallel import PARALLEL_MIN_FORCES, force_pool
+from formatter.rosterview import RosterView
+
+
+def formatted(name: str, options: FormatterOptions, force_workers: int, required_data=ALL_DATA) -> tuple:
+    with open(roster_path(name), 'rb') as stream:
+        roster = RosterView.from_upload(
+            name, stream, options=options, required_data=required_data, force_workers=force_workers,
+        )
+    return [get_printer(x).print(roster) for x in ALL_FORMATS], roster.debug_info, roster.units_count
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+@pytest.mark.parametrize("name", roster_names())
+def test_parallel_forces(monkeypatch, name, indexed):
+    """
+    two_forces.ros has as many forces as workers, three_forces.rosz more.
+    """
+    pools = []
+    monkeypatch.setattr(parallel, 'force_pool', lambda workers: pools.append(workers) or force_pool(workers))
+    required_data = ALL_DATA | {UNIT_DIGESTS} if indexed else ALL_DATA
+    for options in (OPTION_SETS[0], OPTION_SETS[-1]):
+        options = FormatterOptions(**options, debug='on')
+        assert formatted(name, options, 2, required_data) == formatted(name, options, 0, required_data)
+    forces = {'two_forces.ros': 2, 'three_forces.rosz': 3}.get(name, 1)
+    assert bool(pools) == (forces >= PARALLEL_MIN_FORCES)
+
+
+def test_pools_by_number_of_workers():
+    pool = force_pool(1)
+    other = force_pool(2)
+    assert other is not pool
+    # a pool isn't shut down by a request asking for another number of workers
+    assert pool.submit(int, "1").result() == 1
+    assert force_pool(1) is pool